@@ -0,0 +1,108 @@
+"""Benchmark cold import time of the lib modules and guard against eager heavy imports.
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The run fails (exit code 1) if a module pulls in one of its forbidden heavy
+dependencies at import time, or exceeds the optional time budget.
+
+Usage:
+    python -m benchmarks.bench_import_time [--max-ms 1500] [--top 5]
+"""
+import argparse
+import subprocess
+import sys
+
+# Heavy dependencies that must only be imported on first use
+heavy_modules: list[str] = [
+    "bertopic", "hdbscan", "matplotlib", "openai", "pycountry",
+    "sentence_transformers", "sklearn", "spacy", "torch", "umap",
+]
+
+# Modules to benchmark, with the heavy dependencies they must not import eagerly
+modules: dict[str, list[str]] = {
+    "lib.utils_pandas": heavy_modules,
+    "lib.utils_base": heavy_modules,
+    "lib.utils_embeddings": heavy_modules,
+    "lib.utils_models": heavy_modules,
+    "lib.utils_topics": heavy_modules,
+    "lib.bertopic.openai.model_small": heavy_modules,
+    "lib.bertopic.sentence_transformers.model_all_mini_lm_l6_v2": heavy_modules,
+}
+
+
+def import_time(module: str, forbidden: list[str]) -> tuple[float, list[str], list[tuple[float, str]]]:
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        tuple[float, list[str], list[tuple[float, str]]]: Cumulative import time in ms, forbidden
+            modules imported, and (cumulative ms, name) of each direct import of the module.
+
+    Raises:
+        RuntimeError: If the module cannot be imported.
+
+    """
+    code: str = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {forbidden!r} if m in sys.modules))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=False
+    )
+
+    # Raise error if the module cannot be imported
+    if result.returncode != 0:
+        error_msg: str = f"Cannot import {module}: {result.stderr.strip().splitlines()[-1]}"
+        raise RuntimeError(error_msg)
+
+    # Parse "import time: self [us] | cumulative | imported package" lines (children come before parents)
+    total_ms: float = 0.0
+    children: list[tuple[float, str]] = []
+    direct_imports: list[tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        depth: int = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif depth == 0:
+            if name.strip() == module.split(".", maxsplit=1)[0] or name.strip() == module:
+                total_ms += int(cumulative) / 1000
+                direct_imports.extend(children)
+            children = []
+
+    loaded: list[str] = [m for m in result.stdout.strip().split(",") if m]
+    return total_ms, loaded, direct_imports
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if a module takes longer to import")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest direct imports to show")
+    args = parser.parse_args()
+
+    failures: list[str] = []
+    for module, forbidden in modules.items():
+        try:
+            total_ms, loaded, direct_imports = import_time(module, forbidden)
+        except RuntimeError as e:
+            print(f"{module:<60} {'-':>8}     {e}")
+            failures.append(str(e))
+            continue
+        slowest: str = ", ".join(
+            f"{name} {ms:.0f}ms" for ms, name in sorted(direct_imports, reverse=True)[:args.top]
+        )
+        print(f"{module:<60} {total_ms:8.0f}ms   ({slowest})")
+
+        if loaded:
+            failures.append(f"{module} eagerly imports {', '.join(loaded)}")
+        if args.max_ms is not None and total_ms > args.max_ms:
+            failures.append(f"{module} takes {total_ms:.0f}ms to import (budget {args.max_ms:.0f}ms)")
+
+    if failures:
+        print("\n".join(["", "FAILED:", *failures]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
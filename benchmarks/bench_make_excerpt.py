@@ -0,0 +1,71 @@
+"""Benchmark make_excerpt against the previous pattern-by-pattern implementation.
+
+Usage:
+    python -m benchmarks.bench_make_excerpt [--repeat 20] [--num-paragraphs 2]
+"""
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from lib.utils_pandas import abbreviations, make_excerpt
+
+DATASET_PATH = Path("./dataset/titles_with_excerpts_2/dataset.csv")
+
+
+def make_excerpt_legacy(df: pd.DataFrame, column: str, num_paragraphs: int) -> pd.Series:
+    """Previous implementation: one regex replace per abbreviation, then split/slice/join."""
+    excerpt: pd.Series = df[column].replace("[No abstract available]", np.nan).fillna("")
+    for pattern, replacement in abbreviations.items():
+        excerpt = excerpt.str.replace(pattern, replacement, regex=True)
+    return (
+        excerpt
+            .str.split(r"\.\s+", regex=True)
+            .str[:num_paragraphs]
+            .str.join(". ")
+            .add(".")
+            .str.replace(r"^\.$", "", regex=True)
+    )
+
+
+def time_it(func: Callable[..., object], *args: object, runs: int = 3) -> float:
+    """Get the best wall time of several runs."""
+    timings: list[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20, help="Times the corpus is replicated.")
+    parser.add_argument("--num-paragraphs", type=int, default=2)
+    args = parser.parse_args()
+
+    # Use the excerpt part of the docs as abstracts
+    docs = pd.read_csv(DATASET_PATH).doc
+    abstracts = docs.str.extract(r"<excerpt>(.*)</excerpt>", expand=False)
+    df = pd.DataFrame({"abstract": pd.concat([abstracts] * args.repeat, ignore_index=True)})
+
+    # Check outputs are identical
+    legacy = make_excerpt_legacy(df, "abstract", args.num_paragraphs)
+    current = make_excerpt(df, "abstract", args.num_paragraphs)
+    assert legacy.equals(current), "make_excerpt output differs from the legacy implementation"
+
+    legacy_time = time_it(make_excerpt_legacy, df, "abstract", args.num_paragraphs)
+    current_time = time_it(make_excerpt, df, "abstract", args.num_paragraphs)
+
+    print(f"documents: {df.shape[0]}")
+    print(f"legacy:    {legacy_time:.3f}s")
+    print(f"current:   {current_time:.3f}s")
+    print(f"speedup:   {legacy_time / current_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
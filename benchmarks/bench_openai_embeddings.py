@@ -0,0 +1,115 @@
+"""Benchmark the sequential and async OpenAI embedding clients against a local mock server.
+
+The mock server answers /v1/embeddings with deterministic vectors after a
+simulated latency, and randomly rejects requests with a 429 and a
+`retry-after-ms` header, so ordering, retries and rate limit handling can be
+checked without network access or API spend.
+
+Usage:
+    python -m benchmarks.bench_openai_embeddings [--texts 2000] [--latency 0.2] [--rate-limit-ratio 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSIONS = 8
+
+
+def fake_embedding(text: str) -> list[float]:
+    """Get a deterministic embedding for a text."""
+    rng = random.Random(text)  # noqa: S311
+    return [rng.random() for _ in range(DIMENSIONS)]
+
+
+def make_handler(latency: float, rate_limit_ratio: float) -> type[BaseHTTPRequestHandler]:
+    """Make a request handler class mocking the OpenAI embeddings endpoint."""
+
+    class MockEmbeddingsHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            """Answer an embeddings request."""
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+
+            # Randomly reject the request
+            if random.random() < rate_limit_ratio:  # noqa: S311
+                payload = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+                self.send_response(429)
+                self.send_header("retry-after-ms", "50")
+            else:
+                texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                payload = json.dumps({
+                    "object": "list",
+                    "model": body["model"],
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+                        for i, text in enumerate(texts)
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args: object) -> None:
+            """Silence request logging."""
+
+    return MockEmbeddingsHandler
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.1)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Start mock server
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, args.rate_limit_ratio))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_APIKEY", "mock")
+
+    # Import clients once the mock endpoint is configured
+    from lib.utils_embeddings import (  # noqa: PLC0415
+        get_openai_embeddings,
+        get_openai_embeddings_async,
+    )
+
+    texts = [f"document {i} " * random.randint(1, 50) for i in range(args.texts)]  # noqa: S311
+    expected = [fake_embedding(text.replace("\n", " ")) for text in texts]
+
+    # Async client
+    start = time.perf_counter()
+    _, embeddings = asyncio.run(get_openai_embeddings_async(
+        texts, batch_size=args.batch_size, max_concurrency=args.max_concurrency
+    ))
+    async_time = time.perf_counter() - start
+    assert embeddings == expected, "async embeddings are not aligned with the input texts"
+
+    # Sequential client (no rate limiting, it does not retry)
+    server.RequestHandlerClass = make_handler(args.latency, 0.0)
+    start = time.perf_counter()
+    _, sequential_embeddings = get_openai_embeddings(texts, batch_size=args.batch_size, delay_between_batches=0.0)
+    sequential_time = time.perf_counter() - start
+    assert sequential_embeddings == expected, "sequential embeddings are not aligned with the input texts"
+
+    server.shutdown()
+
+    print(f"texts:      {args.texts}")
+    print(f"sequential: {sequential_time:.2f}s (no delay between batches, no 429s)")
+    print(f"async:      {async_time:.2f}s ({args.rate_limit_ratio:.0%} of requests rejected with 429)")
+
+
+if __name__ == "__main__":
+    main()
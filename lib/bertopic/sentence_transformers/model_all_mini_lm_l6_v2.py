@@ -1,21 +1,30 @@
+import copy
+import functools
+from pathlib import Path
 from typing import Any
 
-from bertopic import BERTopic
-from bertopic.representation import KeyBERTInspired, MaximalMarginalRelevance
-from bertopic.vectorizers import ClassTfidfTransformer
-from hdbscan import HDBSCAN
-from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
-from umap import UMAP
+from lib.utils_models import get_sentence_transformer
 
-from sentence_transformers import SentenceTransformer
-
-stop_words = ENGLISH_STOP_WORDS.union({
+# Tags wrapping the parts of each doc, added to the English stop words
+tag_stop_words: set[str] = {
     "<title>", "</title>", "title", "<excerpt>", "</excerpt>", "excerpt",
-})
+}
+
+
+@functools.cache
+def get_stop_words_() -> list[str]:
+    """Get English stop words plus doc tags (sklearn is imported on first use)."""
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS  # noqa: PLC0415
+
+    return list(ENGLISH_STOP_WORDS.union(tag_stop_words))
 
 
 # Default BERTopic settings for topic modeling
 default_bertopic_settings: dict[str, Any] = {
+    "embedding": {
+        # Inference backend: torch, torch-int8, onnx, onnx-int8 (see lib.utils_models)
+        "backend": "torch",
+    },
     "umap": {
         "n_neighbors": 5,
         "n_components": 8,
@@ -23,14 +32,26 @@ default_bertopic_settings: dict[str, Any] = {
         "metric": "cosine",
         "random_state": 42
     },
+    "knn": {
+        # Share one cached pynndescent kNN graph between UMAP fits (only with a cache folder). Off by
+        # default: UMAP searches neighbors exactly below 4096 docs, and the approximate graph changes results
+        "share": False,
+        # Neighbors of the shared graph (None: UMAP n_neighbors)
+        "n_neighbors": None,
+    },
     "hdbscan": {
         "min_cluster_size": 4,
         "metric": "euclidean",
         "cluster_selection_method": "eom",
         "prediction_data": True,
     },
+    "probabilities": {
+        # Dense n_docs x n_topics probabilities (False: compute top-k ones after fit, see lib.utils_topics)
+        "dense": False,
+    },
     "vectorizer": {
-        "stop_words": list(stop_words),
+        # English stop words plus doc tags (see get_stop_words_)
+        "stop_words": "english_with_tags",
         "ngram_range":  (1, 3),
     },
     "ctfidf": {
@@ -47,42 +68,83 @@ default_bertopic_settings: dict[str, Any] = {
 }
 
 
-def get_bertopic_model(overrides: dict[str, Any] | None = None) -> Any:
-    """Create a BERTopic model."""
-    # Apply overrides to default settings via update
+def get_bertopic_model(
+    overrides: dict[str, Any] | None = None,
+    cache_folder: Path | str | None = None,
+) -> Any:
+    """Create a BERTopic model.
+
+    Args:
+        overrides (dict[str, Any] | None, optional): Settings overriding the defaults, by step. Defaults to None.
+        cache_folder (Path | str | None, optional): Folder of the cached UMAP stage (see `CachedUMAP`).
+            Defaults to None (UMAP is fitted at every run).
+
+    Returns:
+        Any: BERTopic model.
+
+    """
+    # Import modeling libraries on first use (they dominate import time)
+    from bertopic import BERTopic  # noqa: PLC0415
+    from bertopic.representation import (  # noqa: PLC0415
+        KeyBERTInspired,
+        MaximalMarginalRelevance,
+    )
+    from bertopic.vectorizers import ClassTfidfTransformer  # noqa: PLC0415
+    from hdbscan import HDBSCAN  # noqa: PLC0415
+    from sklearn.feature_extraction.text import CountVectorizer  # noqa: PLC0415
+    from umap import UMAP  # noqa: PLC0415
+
+    from lib.utils_stages import CachedUMAP  # noqa: PLC0415
+
+    # Apply overrides to a copy of the default settings (defaults stay untouched across calls)
+    settings: dict[str, Any] = copy.deepcopy(default_bertopic_settings)
     if overrides:
         for key, value in overrides.items():
-            if key in default_bertopic_settings:
-                default_bertopic_settings[key].update(value)
+            if key in settings:
+                settings[key].update(value)
+
+    # Resolve default stop words
+    if settings["vectorizer"].get("stop_words") == "english_with_tags":
+        settings["vectorizer"]["stop_words"] = get_stop_words_()
 
-    # Step 1 - Embedder
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+    # Step 1 - Embedder (loaded once per process)
+    embedding_model = get_sentence_transformer(
+        "all-MiniLM-L6-v2", backend=settings["embedding"]["backend"]
+    )
 
-    # Step 2 - Reduce dimensionality
-    umap_model = UMAP(**default_bertopic_settings["umap"])
+    # Step 2 - Reduce dimensionality (cached across runs if a cache folder is given)
+    umap_model = (
+        CachedUMAP(
+            cache_folder,
+            share_knn=settings["knn"]["share"],
+            knn_n_neighbors=settings["knn"]["n_neighbors"],
+            **settings["umap"],
+        )
+        if cache_folder else UMAP(**settings["umap"])
+    )
 
     # Step 3 - Cluster reduced embeddings
-    hdbscan_model = HDBSCAN(**default_bertopic_settings["hdbscan"])
+    hdbscan_model = HDBSCAN(**settings["hdbscan"])
 
     # Step 4 - Tokenize topics
-    vectorizer_model = CountVectorizer(**default_bertopic_settings["vectorizer"])
+    vectorizer_model = CountVectorizer(**settings["vectorizer"])
 
     # Step 5 - Create topic representation
-    ctfidf_model = ClassTfidfTransformer(**default_bertopic_settings["ctfidf"])
+    ctfidf_model = ClassTfidfTransformer(**settings["ctfidf"])
 
     # Step 6 - (Optional) Fine-tune topic representations
     representation_model: list = [
         KeyBERTInspired(
-            **default_bertopic_settings["representation"]["KeyBERTInspired"]
+            **settings["representation"]["KeyBERTInspired"]
         ),
         MaximalMarginalRelevance(
-            **default_bertopic_settings["representation"]["maximal_marginal_relevance"]
+            **settings["representation"]["maximal_marginal_relevance"]
         ),
     ]
 
     # All steps together
     return BERTopic(
-        calculate_probabilities=True,
+        calculate_probabilities=settings["probabilities"]["dense"],
         top_n_words=15,
         embedding_model=embedding_model,           # Step 1 - Extract embeddings
         umap_model=umap_model,                     # Step 2 - Reduce dimensionality
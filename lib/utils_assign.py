@@ -0,0 +1,268 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+import joblib
+import numpy as np
+import orjson
+import pandas as pd
+import scipy.sparse as sp
+from numpy.typing import ArrayLike, NDArray
+from scipy.spatial.distance import jensenshannon
+
+from lib.utils_io import read_dataset, write_dataset
+from lib.utils_store import update_embeddings
+from lib.utils_topics import append_probabilities, get_topk_memberships, topk_default
+
+# Drift of the assigned documents from the fitted ones above which a full refit is recommended
+drift_thresholds: dict[str, float] = {
+    # Outlier ratio of the assigned docs minus the one of the fitted docs
+    "outlier_ratio_increase": 0.10,
+    # Jensen-Shannon divergence (base 2) of the topic distributions of assigned and fitted docs
+    "js_divergence": 0.10,
+    # Number of assigned docs over the number of fitted docs
+    "assigned_share": 0.25,
+}
+
+
+def save_assignment_models(folder: Path | str, topic_model: Any) -> dict[str, Any]:
+    """Persist what assigning topics to new documents needs, next to a saved BERTopic model.
+
+    BERTopic's safetensors serialization leaves out the UMAP and HDBSCAN
+    models, so they are saved as `umap.joblib` and `hdbscan.joblib`, with the
+    HDBSCAN cluster -> topic mapping and the topic counts of the fitted
+    documents (the drift reference) in `assignment.json`.
+
+    Args:
+        folder (Path | str): Folder of the saved BERTopic model.
+        topic_model (Any): Fitted BERTopic model (HDBSCAN with `prediction_data=True`).
+
+    Returns:
+        dict[str, Any]: Assignment metadata.
+
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    # Persist the fitted UMAP (the wrapped one for a cached UMAP stage) and HDBSCAN
+    umap_model: Any = topic_model.umap_model
+    if getattr(umap_model, "umap_", None) is not None:
+        umap_model = umap_model.umap_
+    joblib.dump(umap_model, folder / "umap.joblib")
+    joblib.dump(topic_model.hdbscan_model, folder / "hdbscan.joblib")
+
+    # Persist topic mapping and topic counts of the fitted documents
+    topics: NDArray[np.int64] = np.asarray(topic_model.topics_)
+    values, counts = np.unique(topics, return_counts=True)
+    metadata: dict[str, Any] = {
+        "topic_mapping": {
+            str(from_topic): int(to_topic)
+            for from_topic, to_topic in topic_model.topic_mapper_.get_mappings(original_topics=True).items()
+        },
+        "n_docs": int(topics.size),
+        "topic_counts": {str(topic): int(count) for topic, count in zip(values, counts, strict=True)},
+    }
+    (folder / "assignment.json").write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+
+    return metadata
+
+
+def load_assignment_models(folder: Path | str) -> tuple[Any, Any, dict[str, Any]]:
+    """Load the models saved by `save_assignment_models`.
+
+    Args:
+        folder (Path | str): Folder of the saved BERTopic model.
+
+    Returns:
+        tuple[Any, Any, dict[str, Any]]: Fitted UMAP, fitted HDBSCAN and assignment metadata.
+
+    Raises:
+        FileNotFoundError: If the model was saved without assignment models.
+
+    """
+    folder = Path(folder)
+
+    # Raise error if assignment models are missing
+    missing: list[str] = [
+        name for name in ("umap.joblib", "hdbscan.joblib", "assignment.json") if not (folder / name).exists()
+    ]
+    if missing:
+        error_msg: str = f"Missing {', '.join(missing)} in '{folder}': refit the model to assign topics."
+        raise FileNotFoundError(error_msg)
+
+    return (
+        joblib.load(folder / "umap.joblib"),
+        joblib.load(folder / "hdbscan.joblib"),
+        orjson.loads((folder / "assignment.json").read_bytes()),
+    )
+
+
+def predict_topics(
+    embeddings: ArrayLike,
+    umap_model: Any,
+    hdbscan_model: Any,
+    topic_mapping: dict[int, int],
+) -> tuple[NDArray[np.int64], NDArray[np.float32], NDArray[np.float32]]:
+    """Assign topics to embeddings with the fitted UMAP and HDBSCAN, as `BERTopic.transform` does.
+
+    Args:
+        embeddings (ArrayLike): Embeddings of the documents.
+        umap_model (Any): Fitted UMAP.
+        hdbscan_model (Any): Fitted HDBSCAN (with `prediction_data=True`).
+        topic_mapping (dict[int, int]): HDBSCAN cluster -> topic mapping.
+
+    Returns:
+        tuple[NDArray[np.int64], NDArray[np.float32], NDArray[np.float32]]: Topics (-1 for outliers),
+            strengths of the assignments and reduced embeddings.
+
+    """
+    from hdbscan import approximate_predict  # noqa: PLC0415
+
+    # Reduce embeddings
+    reduced: NDArray[np.float32] = np.asarray(
+        umap_model.transform(np.asarray(embeddings, dtype=np.float32)), dtype=np.float32
+    )
+
+    # Predict clusters and map them to topics (clusters unknown to the mapping are outliers)
+    labels, strengths = approximate_predict(hdbscan_model, reduced)
+    topics: NDArray[np.int64] = np.array([topic_mapping.get(int(label), -1) for label in labels], dtype=np.int64)
+
+    return topics, np.asarray(strengths, dtype=np.float32), reduced
+
+
+def get_topic_drift(metadata: dict[str, Any], assigned_topics: ArrayLike) -> dict[str, float]:
+    """Measure how far the topics of assigned documents drift from the ones of the fitted documents.
+
+    Args:
+        metadata (dict[str, Any]): Assignment metadata (see `save_assignment_models`).
+        assigned_topics (ArrayLike): Topics of the documents assigned since the fit.
+
+    Returns:
+        dict[str, float]: Drift measures, keyed as `drift_thresholds`, plus the outlier ratios.
+
+    """
+    assigned_topics = np.asarray(assigned_topics, dtype=np.int64)
+    reference_counts: dict[int, int] = {int(topic): count for topic, count in metadata["topic_counts"].items()}
+
+    # Compare outlier ratios
+    reference_outlier_ratio: float = reference_counts.get(-1, 0) / metadata["n_docs"]
+    outlier_ratio: float = float(np.mean(assigned_topics == -1)) if assigned_topics.size else 0.0
+
+    # Compare topic distributions (outliers left out)
+    n_topics: int = max(reference_counts) + 1
+    reference: NDArray[np.float64] = np.zeros(n_topics)
+    for topic, count in reference_counts.items():
+        if topic != -1:
+            reference[topic] = count
+    assigned: NDArray[np.int64] = np.bincount(assigned_topics[assigned_topics != -1], minlength=n_topics)
+    js_divergence: float = (
+        float(jensenshannon(reference, assigned, base=2) ** 2) if assigned.sum() and reference.sum() else 0.0
+    )
+
+    return {
+        "outlier_ratio": outlier_ratio,
+        "reference_outlier_ratio": reference_outlier_ratio,
+        "outlier_ratio_increase": outlier_ratio - reference_outlier_ratio,
+        "js_divergence": js_divergence,
+        "assigned_share": assigned_topics.size / metadata["n_docs"],
+    }
+
+
+def assign_topics(  # noqa: PLR0913
+    dataset_filepath: Path | str,
+    dataset_topic_filepath: Path | str,
+    bertopic_folder: Path | str,
+    embeddings_folder: Path | str,
+    embed_fn: Callable[[list[str]], ArrayLike],
+    embedding_model_name: str,
+    embeddings_dtype: Literal["float32", "float16"] = "float32",
+    csv: bool = False,
+) -> dict[str, Any]:
+    """Assign topics to the new documents of a dataset without refitting the topic model.
+
+    New documents are the ones of the dataset whose doc id is not in the
+    dataset with topics yet. They are embedded (only them, through the
+    embedding store), reduced with the saved UMAP, clustered with HDBSCAN's
+    `approximate_predict` and appended, with their topics, to the dataset
+    with topics (and to the saved topic probabilities). Drift is measured on
+    all the documents assigned since the fit, and a refit is recommended once
+    one of `drift_thresholds` is exceeded.
+
+    Args:
+        dataset_filepath (Path | str): Dataset (see `m__dataset`).
+        dataset_topic_filepath (Path | str): Dataset with topics (see `m__bertopic_modeling`).
+        bertopic_folder (Path | str): Folder of the saved BERTopic model.
+        embeddings_folder (Path | str): Folder of the embedding store.
+        embed_fn (Callable[[list[str]], ArrayLike]): Function embedding a list of texts.
+        embedding_model_name (str): Name of the embedding model.
+        embeddings_dtype (Literal["float32", "float16"], optional): Storage dtype of the embeddings.
+            Defaults to "float32".
+        csv (bool, optional): Also export the dataset with topics as CSV. Defaults to False.
+
+    Returns:
+        dict[str, Any]: Number of assigned documents, drift measures, exceeded thresholds
+            and whether a refit is recommended.
+
+    Raises:
+        ValueError: If the saved topic probabilities and the dataset with topics have different numbers of rows.
+
+    """
+    umap_model, hdbscan_model, metadata = load_assignment_models(bertopic_folder)
+    topic_mapping: dict[int, int] = {
+        int(from_topic): to_topic for from_topic, to_topic in metadata["topic_mapping"].items()
+    }
+
+    # Get new documents
+    df: pd.DataFrame = read_dataset(dataset_filepath)
+    df_topic: pd.DataFrame = read_dataset(dataset_topic_filepath)
+    df_new: pd.DataFrame = df[~df.doc_id.isin(df_topic.doc_id)]
+    print(f"Assigning topics to {len(df_new)} new documents out of {len(df)}.")
+
+    # Get the number of saved probability rows (and of topics kept per document, for top-k ones)
+    saved_probs: Path = Path(bertopic_folder) / "probs_topk.npz"
+    dense_probs: Path = Path(bertopic_folder) / "probs.npy"
+    n_saved: int | None = None
+    k: int | None = None
+    if saved_probs.exists():
+        saved_topics: NDArray[np.int32] = sp.load_npz(saved_probs).getnnz(axis=1)
+        n_saved = saved_topics.size
+        # Default number of topics if no saved document has one
+        k = int(saved_topics.max()) if saved_topics.size and saved_topics.max() > 0 else topk_default
+    elif dense_probs.exists():
+        n_saved = np.load(dense_probs, mmap_mode="r").shape[0]
+
+    # Raise error if saved probabilities are not aligned with the dataset with topics
+    if n_saved is not None and n_saved != len(df_topic):
+        error_msg: str = (
+            f"The saved topic probabilities have {n_saved} rows but the dataset with topics has {len(df_topic)}: "
+            "refit the model."
+        )
+        raise ValueError(error_msg)
+
+    if len(df_new):
+        # Embed new documents (the store keeps following the dataset)
+        embeddings: NDArray = update_embeddings(
+            embeddings_folder,
+            doc_ids=df.doc_id.to_list(),
+            texts=df.doc.to_list(),
+            embed_fn=embed_fn,
+            embedding_model_name=embedding_model_name,
+            dtype=embeddings_dtype,
+        )
+        new_rows: NDArray[np.intp] = pd.Index(df.doc_id).get_indexer(df_new.doc_id)
+
+        # Predict topics
+        topics, _, reduced = predict_topics(embeddings[new_rows], umap_model, hdbscan_model, topic_mapping)
+
+        # Append topic probabilities, keeping as many topics per document as the saved ones (all for dense ones)
+        append_probabilities(bertopic_folder, get_topk_memberships(hdbscan_model, topic_mapping, reduced, k=k))
+
+        # Append new documents with their topics
+        df_topic = pd.concat([df_topic, df_new.assign(topic=topics)], ignore_index=True)
+        write_dataset(df_topic, dataset_topic_filepath, csv=csv)
+
+    # Measure drift of all documents assigned since the fit (appended after the fitted ones)
+    drift: dict[str, float] = get_topic_drift(metadata, df_topic.topic.to_numpy()[metadata["n_docs"]:])
+    exceeded: list[str] = [name for name, threshold in drift_thresholds.items() if drift[name] > threshold]
+
+    return {"n_assigned": len(df_new), "drift": drift, "exceeded": exceeded, "refit": bool(exceeded)}
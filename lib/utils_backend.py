@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from bertopic.backend import BaseEmbedder
+from numpy.typing import NDArray
+
+from lib.utils_cache import EmbeddingCache
+
+
+class OfflineEmbedder(BaseEmbedder):
+    """BERTopic embedder serving embeddings from the embedding cache, without a model or network.
+
+    Attached to models loaded for analysis, in place of the embedding model
+    they were fitted with (loading a SentenceTransformer, or building an
+    OpenAI client, is then not needed). Texts embedded during the pipeline
+    are looked up in the embedding cache (see `EmbeddingCache`), opened on
+    first use; without a cache, or for texts not cached, embedding raises.
+    The cache is reopened after pickling, so the embedder is cheap to send
+    to worker processes.
+    """
+
+    def __init__(self, cache_folder: Path | str | None = None, embedding_model_name: str | None = None) -> None:
+        """Create the embedder.
+
+        Args:
+            cache_folder (Path | str | None, optional): Root folder of the embedding cache.
+                Defaults to None (no-op embedder, embedding raises).
+            embedding_model_name (str | None, optional): Name of the embedding model (as in the cache).
+                Defaults to None.
+
+        Raises:
+            ValueError: If a cache folder is given without a model name.
+
+        """
+        super().__init__()
+
+        self.cache_folder: Path | None = None
+        self.embedding_model_name: str = embedding_model_name or ""
+        if cache_folder is not None:
+            # Raise error if the cache cannot be located
+            if not embedding_model_name:
+                error_msg: str = "An embedding model name is needed to look up the embedding cache."
+                raise ValueError(error_msg)
+            self.cache_folder = Path(cache_folder)
+        self.cache_: EmbeddingCache | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Get the state to pickle (the cache connection is left out)."""
+        return {**self.__dict__, "cache_": None}
+
+    def embed(self, documents: list[str], verbose: bool = False) -> NDArray[np.float32]:  # noqa: ARG002
+        """Get the cached embeddings of documents.
+
+        Args:
+            documents (list[str]): Documents (or words) to embed.
+            verbose (bool, optional): Unused, part of the BaseEmbedder interface. Defaults to False.
+
+        Returns:
+            NDArray[np.float32]: Embedding matrix, one row per document.
+
+        Raises:
+            RuntimeError: If the embedder has no cache, or a document is not cached.
+
+        """
+        # Raise error if there is nothing to look up
+        if self.cache_folder is None:
+            error_msg: str = "The model was loaded offline, without embedding model: pass the embeddings instead."
+            raise RuntimeError(error_msg)
+
+        # Open cache on first use
+        if self.cache_ is None:
+            self.cache_ = EmbeddingCache(self.cache_folder, self.embedding_model_name)
+
+        try:
+            return self.cache_.get(list(documents))
+        except KeyError as e:
+            error_msg = f"{e.args[0]} The model was loaded offline: embed them with the embedding model."
+            raise RuntimeError(error_msg) from e
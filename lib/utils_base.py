@@ -1,11 +1,14 @@
 
-import contextlib
+import functools
 import re
-from typing import Any
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-import matplotlib.pyplot as plt
-import pycountry
-import spacy
+import pandas as pd
+
+# spacy, pycountry and matplotlib are imported on first use
+if TYPE_CHECKING:
+    import spacy
 
 
 def get_psychology_sections_list() -> list[str]:
@@ -157,70 +160,138 @@ def get_psychology_sections_list() -> list[str]:
     ]
 
 
-def extract_countries(text: str, nlp_model: spacy.language.Language) -> str | None:
-    """Extract country names from text using spaCy NER and pycountry validation.
+# Common name mappings for problematic countries
+country_mappings: dict[str, str] = {
+    "turkey": "Turkey",
+    "south korea": "Korea, Republic of",
+    "north korea": "Korea, Democratic People's Republic of",
+    "usa": "United States",
+    "united states": "United States",
+    "uk": "United Kingdom",
+    "britain": "United Kingdom",
+    "great britain": "United Kingdom",
+    "russia": "Russian Federation",
+    "iran": "Iran, Islamic Republic of",
+    "syria": "Syrian Arab Republic",
+    "venezuela": "Venezuela, Bolivarian Republic of",
+    "bolivia": "Bolivia, Plurinational State of",
+    "vatican": "Holy See (Vatican City State)",
+    "congo": "Congo",
+    "czech republic": "Czechia",
+}
 
-    Args:
-        text: Input text to extract countries from
-        nlp_model: Pre-loaded spaCy model
+# Multi-word countries that NER might split
+multi_word_countries: dict[str, str] = {
+    "south korea": "Korea, Republic of",
+    "north korea": "Korea, Democratic People's Republic of",
+    "united states": "United States",
+    "united kingdom": "United Kingdom",
+    "great britain": "United Kingdom",
+    "new zealand": "New Zealand",
+    "saudi arabia": "Saudi Arabia",
+    "south africa": "South Africa",
+}
 
-    Returns:
-        Comma-separated string of unique country names found in the text, or None if no countries are found
 
+def preprocess_affiliation_(text: str) -> str:
+    """Remove state abbreviations (e.g., ", CA") from an affiliation string."""
+    # Fast path: no comma, nothing to remove
+    if "," not in text:
+        return text
+    return re.sub(r",\s+[A-Z]{2}\b", "", text)
+
+
+class CountryIndex:
+    """Lookup tables resolving entity texts to pycountry country names.
+
+    The tables replicate the original resolution order (mappings, exact name,
+    common name or substring of the name in pycountry order) with dict lookups.
     """
-    if not isinstance(text, str):
-        return None
 
-    # Preprocess text to remove state abbreviations (e.g., ", CA")
-    cleaned = re.sub(r",\s+[A-Z]{2}\b", "", text)
+    def __init__(self) -> None:
+        import pycountry  # noqa: PLC0415
 
-    doc = nlp_model(cleaned)
-    countries = set()
+        # 1. Mapped names have the highest priority
+        self.mapped: dict[str, str] = dict(country_mappings)
 
-    # Common name mappings for problematic countries
-    country_mappings = {
-        "turkey": "Turkey",
-        "south korea": "Korea, Republic of",
-        "north korea": "Korea, Democratic People's Republic of",
-        "usa": "United States",
-        "united states": "United States",
-        "uk": "United Kingdom",
-        "britain": "United Kingdom",
-        "great britain": "United Kingdom",
-        "russia": "Russian Federation",
-        "iran": "Iran, Islamic Republic of",
-        "syria": "Syrian Arab Republic",
-        "venezuela": "Venezuela, Bolivarian Republic of",
-        "bolivia": "Bolivia, Plurinational State of",
-        "vatican": "Holy See (Vatican City State)",
-        "congo": "Congo",
-        "czech republic": "Czechia",
-    }
+        # 2. Exact (case insensitive) pycountry names
+        self.exact: dict[str, str] = {}
 
-    def find_country_(entity_text: str) -> str | None:
-        """Try multiple methods to find a country match."""
+        # 3. Common names and every substring of the names (first country wins)
+        self.partial: dict[str, str] = {}
+
+        for country in pycountry.countries:
+            name: str = country.name
+            name_lower: str = name.lower()
+            self.exact.setdefault(name_lower, name)
+            if hasattr(country, "common_name"):
+                self.partial.setdefault(country.common_name.lower(), name)
+            for start in range(len(name_lower) + 1):
+                for end in range(start, len(name_lower) + 1):
+                    self.partial.setdefault(name_lower[start:end], name)
+
+        # Multi-word countries, matched in a single (overlapping) scan
+        self.multi_word: dict[str, str] = dict(multi_word_countries)
+        self.multi_word_pattern: re.Pattern[str] = re.compile(
+            "(?=(" + "|".join(re.escape(pattern) for pattern in self.multi_word) + "))"
+        )
+
+    def lookup(self, entity_text: str) -> str | None:
+        """Resolve an entity text to a country name.
+
+        Args:
+            entity_text: Text of the entity found by NER
+
+        Returns:
+            Country name, or None if the entity is not a country
+
+        """
         entity_lower = entity_text.lower().strip()
 
-        # 1. Check mappings first
-        if entity_lower in country_mappings:
-            return country_mappings[entity_lower]
+        if entity_lower in self.mapped:
+            return self.mapped[entity_lower]
 
-        # 2. Try exact name match
-        with contextlib.suppress(KeyError, LookupError):
-            country = pycountry.countries.get(name=entity_text)
-            if country:
-                return country.name
+        return self.exact.get(entity_text.lower()) or self.partial.get(entity_lower)
 
-        # 3. Try alternative names (common_name, official_name)
-        for country in pycountry.countries:
-            # Check common name
-            if hasattr(country, "common_name") and country.common_name.lower() == entity_lower:
-                return country.name
-            # Check if entity is part of official name
-            if entity_lower in country.name.lower():
-                return country.name
+    def find_multi_word(self, text: str) -> set[str]:
+        """Find multi-word countries that NER might split (e.g., "South Korea").
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of country names found in the text
+
+        """
+        return {
+            self.multi_word[match.group(1)]
+            for match in self.multi_word_pattern.finditer(text.lower())
+        }
 
-        return None
+
+@functools.cache
+def get_country_index() -> CountryIndex:
+    """Get the country lookup index, building it on first use."""
+    return CountryIndex()
+
+
+def find_country_(entity_text: str) -> str | None:
+    """Try multiple methods to find a country match."""
+    return get_country_index().lookup(entity_text)
+
+
+def countries_from_doc_(doc: "spacy.tokens.Doc", text: str) -> frozenset[str]:
+    """Collect country names from a processed spaCy doc and its original text.
+
+    Args:
+        doc: spaCy doc obtained from the preprocessed text
+        text: Original (not preprocessed) text
+
+    Returns:
+        Set of unique country names found in the text
+
+    """
+    countries = set()
 
     # Extract entities labeled as GPE or LOC
     for ent in doc.ents:
@@ -231,27 +302,210 @@ def extract_countries(text: str, nlp_model: spacy.language.Language) -> str | No
 
     # Additional check for multi-word countries that might be split
     # Look for common patterns like "South Korea", "North Korea", etc.
-    text_lower = text.lower()
-    multi_word_countries = {
-        "south korea": "Korea, Republic of",
-        "north korea": "Korea, Democratic People's Republic of",
-        "united states": "United States",
-        "united kingdom": "United Kingdom",
-        "great britain": "United Kingdom",
-        "new zealand": "New Zealand",
-        "saudi arabia": "Saudi Arabia",
-        "south africa": "South Africa",
-    }
+    countries.update(get_country_index().find_multi_word(text))
 
-    for pattern, official_name in multi_word_countries.items():
-        if pattern in text_lower:
-            countries.add(official_name)
+    return frozenset(countries)
 
+
+def format_countries_(countries: set[str] | frozenset[str]) -> str | None:
+    """Format a set of country names as a sorted " - " separated string, or None if empty."""
     return " - ".join(sorted(countries)) if countries else None
 
 
+def split_affiliations_(text: str, split_affiliations: bool) -> list[str]:
+    """Split an affiliations string on ";" into single institutions, if requested."""
+    if not split_affiliations:
+        return [text]
+    return [part.strip() for part in text.split(";") if part.strip()]
+
+
+class CountryCacheInfo(NamedTuple):
+    """Statistics of a CountryCache."""
+
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+class CountryCache:
+    """Bounded LRU cache of affiliation string -> countries found by NER.
+
+    Hits and misses are counted so the NER work saved on a run can be inspected
+    with `info()`.
+    """
+
+    def __init__(self, maxsize: int | None = 100_000) -> None:
+        self.maxsize: int | None = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._data: OrderedDict[str, frozenset[str]] = OrderedDict()
+
+    def get(self, key: str) -> frozenset[str] | None:
+        """Get the countries cached for an affiliation, or None on a miss."""
+        countries = self._data.get(key)
+        if countries is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return countries
+
+    def put(self, key: str, countries: frozenset[str]) -> None:
+        """Cache the countries found for an affiliation, evicting the least recently used entry."""
+        self._data[key] = countries
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def info(self) -> CountryCacheInfo:
+        """Get cache statistics."""
+        return CountryCacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self) -> None:
+        """Empty the cache and reset statistics."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def ner_only_disabled_(nlp_model: "spacy.language.Language") -> list[str]:
+    """Get the names of the pipeline components that are not needed by NER.
+
+    Args:
+        nlp_model: Pre-loaded spaCy model
+
+    Returns:
+        list[str]: Names of the components that can be disabled without changing NER output.
+
+    """
+    # Keep ner and any shared token-to-vector layer ner listens to
+    needed: set[str] = {"ner"}
+    for name, component in nlp_model.pipeline:
+        if "ner" in getattr(component, "listening_components", []):
+            needed.add(name)
+
+    return [name for name in nlp_model.pipe_names if name not in needed]
+
+
+def extract_countries(
+    text: str,
+    nlp_model: "spacy.language.Language",
+    cache: CountryCache | None = None,
+    split_affiliations: bool = False,
+) -> str | None:
+    """Extract country names from text using spaCy NER and pycountry validation.
+
+    Args:
+        text: Input text to extract countries from
+        nlp_model: Pre-loaded spaCy model
+        cache: Optional cache of already resolved affiliations
+        split_affiliations: Resolve each ";" separated affiliation on its own (default is False)
+
+    Returns:
+        Comma-separated string of unique country names found in the text, or None if no countries are found
+
+    """
+    if not isinstance(text, str):
+        return None
+
+    countries: set[str] = set()
+
+    for part in split_affiliations_(text, split_affiliations):
+        # Reuse countries of already seen affiliations
+        part_countries = cache.get(part) if cache is not None else None
+
+        if part_countries is None:
+            # Preprocess text to remove state abbreviations (e.g., ", CA")
+            cleaned = preprocess_affiliation_(part)
+            part_countries = countries_from_doc_(nlp_model(cleaned), part)
+            if cache is not None:
+                cache.put(part, part_countries)
+
+        countries.update(part_countries)
+
+    return format_countries_(countries)
+
+
+def extract_countries_bulk(  # noqa: PLR0913
+    series: pd.Series,
+    nlp_model: "spacy.language.Language",
+    n_process: int = 1,
+    batch_size: int = 256,
+    cache: CountryCache | None = None,
+    split_affiliations: bool = False,
+) -> pd.Series:
+    """Extract country names from a Series of texts with batched spaCy NER.
+
+    Each distinct affiliation is resolved once: texts are deduplicated (and
+    looked up in the cache, if given) before being streamed through `nlp.pipe`
+    with every component but NER disabled, optionally across several processes.
+    Results are identical to applying `extract_countries` row by row.
+
+    Args:
+        series: Series of texts to extract countries from
+        nlp_model: Pre-loaded spaCy model
+        n_process: Number of processes used by spaCy (default is 1)
+        batch_size: Number of texts buffered per batch (default is 256)
+        cache: Optional cache of already resolved affiliations
+        split_affiliations: Resolve each ";" separated affiliation on its own (default is False)
+
+    Returns:
+        Series aligned with the input holding comma-separated country names, or None if no countries are found
+
+    """
+    # Init result with None for every row
+    result: pd.Series = pd.Series([None] * len(series), index=series.index, dtype=object)
+
+    # Only strings are processed
+    is_text: pd.Series = series.map(lambda x: isinstance(x, str))
+    rows: list[list[str]] = [
+        split_affiliations_(text, split_affiliations) for text in series[is_text]
+    ]
+
+    # Get distinct affiliations (repeated ones are resolved once, without counting as cache hits)
+    distinct_parts: dict[str, None] = dict.fromkeys(part for parts in rows for part in parts)
+
+    # Resolve cached affiliations, collect the others for NER
+    resolved: dict[str, frozenset[str]] = {}
+    pending: list[str] = []
+    for part in distinct_parts:
+        part_countries = cache.get(part) if cache is not None else None
+        if part_countries is not None:
+            resolved[part] = part_countries
+        else:
+            pending.append(part)
+
+    # Pair preprocessed texts with originals (used for the multi-word check)
+    pairs = ((preprocess_affiliation_(part), part) for part in pending)
+
+    # Run NER only, in batches
+    docs = nlp_model.pipe(
+        pairs,
+        as_tuples=True,
+        n_process=n_process,
+        batch_size=batch_size,
+        disable=ner_only_disabled_(nlp_model),
+    )
+
+    # Collect countries
+    for doc, part in docs:
+        resolved[part] = countries_from_doc_(doc, part)
+        if cache is not None:
+            cache.put(part, resolved[part])
+
+    result[is_text] = [
+        format_countries_(frozenset().union(*(resolved[part] for part in parts)))
+        for parts in rows
+    ]
+
+    return result
+
+
 def configure_matplotlib_environment() -> Any:
     """Configure matplotlib environment for consistent plotting style."""
+    import matplotlib.pyplot as plt  # noqa: PLC0415
+
     # Set global matplotlib parameters
     plt.rcParams.update(
         {
@@ -0,0 +1,256 @@
+import hashlib
+import os
+import re
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+
+def normalize_text_(text: str) -> str:
+    """Normalize a text for hashing by collapsing whitespace."""
+    return " ".join(text.split())
+
+
+def hash_text(text: str) -> str:
+    """Get the content hash of a normalized text.
+
+    Args:
+        text (str): Text to hash.
+
+    Returns:
+        str: Hex digest of the SHA-256 hash of the normalized text.
+
+    """
+    return hashlib.sha256(normalize_text_(text).encode("utf-8")).hexdigest()
+
+
+def hash_texts(texts: list[str]) -> str:
+    """Get a hash identifying an ordered list of texts.
+
+    Args:
+        texts (list[str]): List of texts.
+
+    Returns:
+        str: Hex digest of the SHA-256 hash of the texts.
+
+    """
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def hash_array(array: NDArray, chunk_size: int = 65_536) -> str:
+    """Get a hash identifying the content, shape and dtype of an array.
+
+    Rows are hashed chunk by chunk, so memory-mapped arrays are never fully loaded.
+
+    Args:
+        array (NDArray): Array to hash.
+        chunk_size (int, optional): Number of rows hashed at a time. Defaults to 65_536.
+
+    Returns:
+        str: Hex digest of the SHA-256 hash of the array.
+
+    """
+    digest = hashlib.sha256(f"{array.shape}|{array.dtype.str}".encode())
+    for i in range(0, array.shape[0], chunk_size):
+        digest.update(np.ascontiguousarray(array[i:i + chunk_size]).tobytes())
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (model name, hash of normalized text).
+
+    Each model gets its own folder holding an append-only float32 vector file,
+    read back through a memory map, and a SQLite index mapping text hashes to
+    rows of that file. Texts differing only in whitespace share an entry.
+    The index also records the number of committed rows: bytes past them
+    (left by an interrupted write) are truncated, so appends stay aligned.
+    """
+
+    # Max number of keys per SQLite query
+    query_size_: int = 900
+
+    def __init__(self, folder: Path | str, model_name: str) -> None:
+        """Open (or create) the cache of a model.
+
+        Args:
+            folder (Path | str): Root folder of the cache.
+            model_name (str): Name of the embedding model.
+
+        """
+        self.model_name: str = model_name
+        self.folder: Path = Path(folder) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.vectors_path: Path = self.folder / "vectors.f32"
+
+        # Open index
+        self.connection: sqlite3.Connection = sqlite3.connect(self.folder / "index.sqlite")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+        # Get embedding dimension, unknown until the first vectors are added
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim: int | None = int(row[0]) if row else None
+
+        # Get committed rows (caches predating the row count end at the last indexed row)
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone()
+        self.n_rows: int = (
+            int(row[0]) if row
+            else self.connection.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings").fetchone()[0]
+        )
+
+        # Drop rows of an interrupted write
+        if self.dim is not None and self.vectors_path.exists():
+            with self.vectors_path.open("r+b") as f:
+                f.truncate(self.n_rows * self.dim * np.dtype(np.float32).itemsize)
+
+    def __len__(self) -> int:
+        """Get the number of cached texts."""
+        return int(self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0])
+
+    def lookup_(self, keys: list[str]) -> dict[str, int]:
+        """Get the rows of the cached keys."""
+        rows: dict[str, int] = {}
+        unique_keys: list[str] = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), self.query_size_):
+            chunk: list[str] = unique_keys[i:i + self.query_size_]
+            placeholders: str = ",".join("?" * len(chunk))
+            rows.update(self.connection.execute(
+                f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", chunk  # noqa: S608
+            ).fetchall())
+        return rows
+
+    def missing(self, texts: list[str]) -> list[str]:
+        """Get the texts that are not cached, one per distinct normalized text.
+
+        Args:
+            texts (list[str]): List of texts.
+
+        Returns:
+            list[str]: Texts to embed, in order of first appearance.
+
+        """
+        keys: list[str] = [hash_text(text) for text in texts]
+        cached: dict[str, int] = self.lookup_(keys)
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in cached:
+                missing.setdefault(key, text)
+        return list(missing.values())
+
+    def get(self, texts: list[str]) -> NDArray[np.float32]:
+        """Get the cached embeddings of a list of texts.
+
+        Args:
+            texts (list[str]): List of texts.
+
+        Returns:
+            NDArray[np.float32]: Embedding matrix, one row per text.
+
+        Raises:
+            KeyError: If any text is not cached.
+
+        """
+        keys: list[str] = [hash_text(text) for text in texts]
+        cached: dict[str, int] = self.lookup_(keys)
+
+        # Raise error if any text is missing
+        if len(cached) < len(set(keys)):
+            error_msg: str = f"{len(set(keys)) - len(cached)} texts are not cached for model '{self.model_name}'."
+            raise KeyError(error_msg)
+
+        if self.dim is None:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Gather rows from the memory-mapped vectors (committed rows only)
+        vectors: NDArray[np.float32] = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(self.n_rows, self.dim)
+        )
+        return np.asarray(vectors[[cached[key] for key in keys]])
+
+    def put(self, texts: list[str], embeddings: ArrayLike) -> None:
+        """Add the embeddings of a list of texts to the cache.
+
+        Args:
+            texts (list[str]): List of texts.
+            embeddings (ArrayLike): Embedding matrix, one row per text.
+
+        Raises:
+            ValueError: If shapes do not match the texts or the cached dimension.
+
+        """
+        vectors: NDArray[np.float32] = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        # Raise error if shapes are not consistent
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts) or self.dim not in (None, vectors.shape[1]):  # noqa: PLR2004
+            error_msg: str = (
+                f"Cannot cache embeddings of shape {vectors.shape} for {len(texts)} texts "
+                f"(cached dimension is {self.dim})."
+            )
+            raise ValueError(error_msg)
+
+        if not texts:
+            return
+
+        # Store dimension on first use
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with self.connection:
+                self.connection.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+
+        # Write vectors after the committed rows (overwriting bytes of an interrupted write)
+        first_row: int = self.n_rows
+        with self.vectors_path.open("r+b" if self.vectors_path.exists() else "wb") as f:
+            f.truncate(first_row * self.dim * vectors.itemsize)
+            f.seek(first_row * self.dim * vectors.itemsize)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Index rows and commit them in one transaction
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, row) VALUES (?, ?)",
+                ((hash_text(text), first_row + i) for i, text in enumerate(texts)),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('rows', ?)", (str(first_row + len(texts)),)
+            )
+        self.n_rows = first_row + len(texts)
+
+    def get_or_compute(
+        self,
+        texts: list[str],
+        embed_fn: Callable[[list[str]], ArrayLike],
+    ) -> NDArray[np.float32]:
+        """Get the embeddings of a list of texts, computing only the ones not cached.
+
+        Args:
+            texts (list[str]): List of texts.
+            embed_fn (Callable[[list[str]], ArrayLike]): Function embedding a list of texts.
+
+        Returns:
+            NDArray[np.float32]: Embedding matrix, one row per text.
+
+        """
+        # Embed new or changed texts only
+        missing: list[str] = self.missing(texts)
+        if missing:
+            self.put(missing, embed_fn(missing))
+
+        return self.get(texts)
+
+    def close(self) -> None:
+        """Close the index."""
+        self.connection.close()
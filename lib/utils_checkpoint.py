@@ -0,0 +1,170 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+from numpy.typing import ArrayLike, NDArray
+
+from lib.utils_cache import hash_texts
+
+
+class EmbeddingJob:
+    """Checkpointed embedding job over a fixed list of texts.
+
+    Completed batches are appended to a float32 shard file and recorded in a
+    JSON manifest, so an interrupted job resumes from the batches still
+    pending. Shard rows past the ones recorded in the manifest (left by an
+    interrupted write) are truncated, so appends stay aligned. The final
+    embedding matrix is assembled batch by batch into a memory-mapped `.npy`
+    file.
+    """
+
+    def __init__(
+        self,
+        folder: Path | str,
+        texts: list[str],
+        embedding_model_name: str,
+        batch_size: int,
+    ) -> None:
+        """Open (or resume) a job.
+
+        Args:
+            folder (Path | str): Folder holding the manifest and the shard file.
+            texts (list[str]): List of texts to embed.
+            embedding_model_name (str): Name of the embedding model.
+            batch_size (int): Number of texts in each batch.
+
+        Raises:
+            ValueError: If the folder holds a job for other texts, model or batch size.
+
+        """
+        self.folder: Path = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.manifest_path: Path = self.folder / "manifest.json"
+        self.shards_path: Path = self.folder / "shards.f32"
+        self.n_texts: int = len(texts)
+        self.batch_size: int = batch_size
+
+        manifest: dict[str, Any] = {
+            "embedding_model_name": embedding_model_name,
+            "n_texts": len(texts),
+            "batch_size": batch_size,
+            "texts_hash": hash_texts(texts),
+            "dim": None,
+            # Batch index -> first row of the batch in the shard file
+            "batches": {},
+        }
+
+        # Resume existing job
+        if self.manifest_path.exists():
+            existing: dict[str, Any] = orjson.loads(self.manifest_path.read_bytes())
+            for key in ("embedding_model_name", "n_texts", "batch_size", "texts_hash"):
+                if existing[key] != manifest[key]:
+                    error_msg: str = f"The job in '{self.folder}' was started with a different {key}."
+                    raise ValueError(error_msg)
+            manifest = existing
+
+        self.manifest: dict[str, Any] = manifest
+
+        # Drop shard rows of an interrupted write
+        if self.shards_path.exists():
+            with self.shards_path.open("r+b") as f:
+                f.truncate(self.n_rows * (self.manifest["dim"] or 0) * np.dtype(np.float32).itemsize)
+
+    @property
+    def n_rows(self) -> int:
+        """Get the number of shard rows recorded in the manifest (the end of the last recorded batch)."""
+        ends: list[int] = [
+            first_row + self.batch_bounds(int(batch_index))[1] - self.batch_bounds(int(batch_index))[0]
+            for batch_index, first_row in self.manifest["batches"].items()
+        ]
+        return max(ends, default=0)
+
+    @property
+    def n_batches(self) -> int:
+        """Get the number of batches of the job."""
+        return -(-self.n_texts // self.batch_size)
+
+    def batch_bounds(self, batch_index: int) -> tuple[int, int]:
+        """Get the start and end index of the texts of a batch."""
+        start: int = batch_index * self.batch_size
+        return start, min(start + self.batch_size, self.n_texts)
+
+    def pending_batches(self) -> list[int]:
+        """Get the indexes of the batches not completed yet."""
+        return [i for i in range(self.n_batches) if str(i) not in self.manifest["batches"]]
+
+    def is_complete(self) -> bool:
+        """Check whether all batches are completed."""
+        return not self.pending_batches()
+
+    def write_batch(self, batch_index: int, embeddings: ArrayLike) -> None:
+        """Append the embeddings of a completed batch and record it in the manifest.
+
+        Args:
+            batch_index (int): Index of the batch.
+            embeddings (ArrayLike): Embedding matrix of the batch.
+
+        Raises:
+            ValueError: If the shape does not match the batch or the job dimension.
+
+        """
+        vectors: NDArray[np.float32] = np.ascontiguousarray(embeddings, dtype=np.float32)
+        start, end = self.batch_bounds(batch_index)
+
+        # Raise error if shapes are not consistent
+        if vectors.ndim != 2 or vectors.shape[0] != end - start or self.manifest["dim"] not in (None, vectors.shape[1]):  # noqa: PLR2004
+            error_msg: str = f"Unexpected embeddings of shape {vectors.shape} for batch {batch_index}."
+            raise ValueError(error_msg)
+        self.manifest["dim"] = vectors.shape[1]
+
+        # Write to shard file after the recorded rows (overwriting bytes of an interrupted write)
+        first_row: int = self.n_rows
+        row_bytes: int = vectors.shape[1] * vectors.itemsize
+        with self.shards_path.open("r+b" if self.shards_path.exists() else "wb") as f:
+            f.truncate(first_row * row_bytes)
+            f.seek(first_row * row_bytes)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Record batch, replacing the manifest atomically
+        self.manifest["batches"][str(batch_index)] = first_row
+        tmp_path: Path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_bytes(orjson.dumps(self.manifest, option=orjson.OPT_INDENT_2))
+        tmp_path.replace(self.manifest_path)
+
+    def assemble(self, filepath: Path | str) -> NDArray[np.float32]:
+        """Assemble the embeddings of all batches, in text order, into a `.npy` file.
+
+        Args:
+            filepath (Path | str): Path of the `.npy` file to write.
+
+        Returns:
+            NDArray[np.float32]: Memory-mapped embedding matrix.
+
+        Raises:
+            RuntimeError: If some batches are not completed.
+
+        """
+        # Raise error if job is not complete
+        pending: list[int] = self.pending_batches()
+        if pending:
+            error_msg: str = f"{len(pending)} batches of the job in '{self.folder}' are not completed."
+            raise RuntimeError(error_msg)
+
+        dim: int = self.manifest["dim"]
+        shards: NDArray[np.float32] = np.memmap(self.shards_path, dtype=np.float32, mode="r", shape=(self.n_rows, dim))
+        embeddings: np.memmap = np.lib.format.open_memmap(
+            filepath, mode="w+", dtype=np.float32, shape=(self.n_texts, dim)
+        )
+
+        # Copy batch by batch
+        for batch_index in range(self.n_batches):
+            start, end = self.batch_bounds(batch_index)
+            first_row: int = self.manifest["batches"][str(batch_index)]
+            embeddings[start:end] = shards[first_row:first_row + end - start]
+        embeddings.flush()
+
+        return embeddings
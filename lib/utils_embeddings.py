@@ -1,23 +1,92 @@
+import asyncio
+import base64
+import functools
+import random
+import re
 import time
 from os import getenv
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
 
-from dotenv import load_dotenv
+import numpy as np
 from numpy.typing import NDArray
-from openai import OpenAI
-from sentence_transformers import SentenceTransformer
 
-# Load env vars
-load_dotenv()
+from lib.utils_cache import EmbeddingCache
+from lib.utils_checkpoint import EmbeddingJob
+from lib.utils_models import Backend, get_sentence_transformer
 
-# Initiate openai client
-client = OpenAI(api_key=getenv("OPENAI_APIKEY"))
+# openai is imported on first use (see get_openai_client)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+
+@functools.cache
+def load_env_() -> None:
+    """Load env vars from .env, once per process."""
+    from dotenv import load_dotenv  # noqa: PLC0415
+
+    load_dotenv()
+
+
+@functools.cache
+def get_openai_client() -> "OpenAI":
+    """Get the OpenAI client, built from env vars on first use.
+
+    Returns:
+        OpenAI: OpenAI client shared by this process.
+
+    """
+    from openai import OpenAI  # noqa: PLC0415
+
+    load_env_()
+    return OpenAI(api_key=getenv("OPENAI_APIKEY"))
+
+
+class LazyOpenAIClient:
+    """OpenAI client built (see `get_openai_client`) on first use.
+
+    Models holding it can be created and sent to worker processes without
+    an API key (e.g., in sweeps fitted on precomputed embeddings); only
+    embedding texts needs one.
+    """
+
+    def __init__(self) -> None:
+        """Create the client, without building the OpenAI one."""
+        self.client_: OpenAI | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Get the state to pickle (the OpenAI client is left out)."""
+        return {"client_": None}
+
+    def __getattr__(self, name: str) -> Any:
+        """Get an attribute of the OpenAI client, building it on first use."""
+        # Private attributes are never forwarded (e.g., while unpickling)
+        if name.startswith("_") or name == "client_":
+            raise AttributeError(name)
+
+        if self.client_ is None:
+            self.client_ = get_openai_client()
+        return getattr(self.client_, name)
+
+
+def check_cache_model_(cache: EmbeddingCache, embedding_model_name: str) -> None:
+    """Check the cache holds embeddings of the given model.
+
+    Raises:
+        ValueError: If the cache belongs to another model.
+
+    """
+    if cache.model_name != embedding_model_name:
+        error_msg: str = f"The cache holds '{cache.model_name}' embeddings, not '{embedding_model_name}' ones."
+        raise ValueError(error_msg)
 
 
 def get_openai_embeddings(
     texts: list[str],
     embedding_model_name: str = "text-embedding-3-large",
     batch_size: int = 100,
-    delay_between_batches: float = 1.0
+    delay_between_batches: float = 1.0,
+    cache: EmbeddingCache | None = None,
 ) -> tuple[str, list[float] | list[list[float]]]:
     """Get embeddings for a given text or list of texts using OpenAI API with batch processing.
 
@@ -26,13 +95,14 @@ def get_openai_embeddings(
         embedding_model_name (str, optional): Embedding model to use. Defaults to "text-embedding-3-large".
         batch_size (int, optional): Number of texts to process in each batch. Defaults to 100.
         delay_between_batches (float, optional): Delay in seconds between batches. Defaults to 1.0.
+        cache (EmbeddingCache | None, optional): Cache of the model; only texts not cached are sent. Defaults to None.
 
     Returns:
         tuple[str, list[float] | list[list[float]]]: Embedding model name and embedding vector(s).
         single text input, or list of lists for multiple texts.
 
     Raises:
-        ValueError: If the 'texts' list is empty.
+        ValueError: If the 'texts' list is empty, or the cache belongs to another model.
         Exception: For any errors during API calls.
 
     """
@@ -41,6 +111,17 @@ def get_openai_embeddings(
         error_msg: str = "The 'texts' list is empty. Please provide at least one text."
         raise ValueError(error_msg)
 
+    # Embed only texts not cached
+    if cache is not None:
+        check_cache_model_(cache, embedding_model_name)
+        embeddings: NDArray = cache.get_or_compute(
+            texts,
+            lambda missing: get_openai_embeddings(
+                missing, embedding_model_name, batch_size, delay_between_batches
+            )[1],
+        )
+        return embedding_model_name, embeddings.tolist()
+
     # Remove newlines from texts to improve consistency
     cleaned_texts: list[str] = [text.replace("\n", " ") for text in texts]
 
@@ -55,7 +136,7 @@ def get_openai_embeddings(
 
         try:
             # Call OpenAI API for the batch
-            response = client.embeddings.create(input=batch, model=embedding_model_name)
+            response = get_openai_client().embeddings.create(input=batch, model=embedding_model_name)
 
             # Extract embeddings from response
             batch_embeddings: list[list[float]] = [data.embedding for data in response.data]
@@ -74,20 +155,558 @@ def get_openai_embeddings(
     return embedding_model_name, all_embeddings
 
 
-def get_all_minilm_l6_v2_embeddings(
+def embedding_dim_(embedding: str | list[float]) -> int:
+    """Get the dimension of an embedding returned by the API (base64 string or list of floats)."""
+    return len(base64.b64decode(embedding)) // 4 if isinstance(embedding, str) else len(embedding)
+
+
+def decode_embeddings_(data: list[Any], out: NDArray[np.float32]) -> None:
+    """Decode the embeddings of a response into the rows of a float32 buffer.
+
+    Args:
+        data (list[Any]): Embedding objects of the response.
+        out (NDArray[np.float32]): Buffer with one row per embedding, filled in place by response index.
+
+    """
+    for item in data:
+        if isinstance(item.embedding, str):
+            # base64 encoded little-endian float32
+            out[item.index] = np.frombuffer(base64.b64decode(item.embedding), dtype="<f4")
+        else:
+            out[item.index] = item.embedding
+
+
+def response_to_array_(data: list[Any]) -> NDArray[np.float32]:
+    """Decode the embeddings of a response into a new float32 array."""
+    out: NDArray[np.float32] = np.empty((len(data), embedding_dim_(data[0].embedding)), dtype=np.float32)
+    decode_embeddings_(data, out)
+    return out
+
+
+def get_openai_embeddings_array(  # noqa: PLR0913
+    texts: list[str],
+    embedding_model_name: str = "text-embedding-3-large",
+    batch_size: int = 100,
+    delay_between_batches: float = 1.0,
+    encoding_format: Literal["float", "base64"] = "base64",
+    out: NDArray[np.float32] | None = None,
+) -> NDArray[np.float32]:
+    """Get embeddings for a list of texts using OpenAI API, decoded straight into a float32 array.
+
+    Unlike `get_openai_embeddings`, no list of Python floats is accumulated:
+    each response is decoded into its rows of a preallocated buffer. With the
+    "base64" encoding, vectors are transferred as raw float32 bytes and JSON
+    float parsing is skipped as well.
+
+    Args:
+        texts (list[str]): List of texts to get embeddings for.
+        embedding_model_name (str, optional): Embedding model to use. Defaults to "text-embedding-3-large".
+        batch_size (int, optional): Number of texts to process in each batch. Defaults to 100.
+        delay_between_batches (float, optional): Delay in seconds between batches. Defaults to 1.0.
+        encoding_format (Literal["float", "base64"], optional): Encoding requested to the API. Defaults to "base64".
+        out (NDArray[np.float32] | None, optional): Buffer to fill, e.g. a memory-mapped `.npy` file
+            from `np.lib.format.open_memmap`. Defaults to an array allocated after the first response.
+
+    Returns:
+        NDArray[np.float32]: Embedding matrix, one row per text.
+
+    Raises:
+        ValueError: If the 'texts' list is empty, or `out` has not one row per text.
+        Exception: For any errors during API calls.
+
+    """
+    # Raise error if texts is empty
+    if not texts:
+        error_msg: str = "The 'texts' list is empty. Please provide at least one text."
+        raise ValueError(error_msg)
+
+    # Raise error if buffer does not fit texts
+    if out is not None and out.shape[0] != len(texts):
+        error_msg = f"The 'out' buffer has {out.shape[0]} rows for {len(texts)} texts."
+        raise ValueError(error_msg)
+
+    # Remove newlines from texts to improve consistency
+    cleaned_texts: list[str] = [text.replace("\n", " ") for text in texts]
+
+    # Buffer holding all embeddings (allocated on the first batch, once the dimension is known)
+    embeddings: NDArray[np.float32] = out if out is not None else np.empty((0, 0), dtype=np.float32)
+
+    # Process in batches
+    for i in range(0, len(cleaned_texts), batch_size):
+
+        # Get the current batch
+        batch: list[str] = cleaned_texts[i:i + batch_size]
+
+        try:
+            # Call OpenAI API for the batch
+            response = get_openai_client().embeddings.create(
+                input=batch, model=embedding_model_name, encoding_format=encoding_format
+            )
+
+            # Allocate buffer once the dimension is known
+            if embeddings.shape[0] != len(cleaned_texts):
+                embeddings = np.empty(
+                    (len(cleaned_texts), embedding_dim_(response.data[0].embedding)), dtype=np.float32
+                )
+
+            # Decode batch embeddings into their rows
+            decode_embeddings_(response.data, embeddings[i:i + len(batch)])
+
+            # Add delay between batches to avoid rate limiting
+            if i + batch_size < len(cleaned_texts):
+                time.sleep(delay_between_batches)
+
+        except Exception as e:
+            print(f"Error processing batch {i // batch_size + 1}: {e}")
+            raise
+
+    return embeddings
+
+
+def run_openai_embedding_job(  # noqa: PLR0913
+    texts: list[str],
+    job_folder: Path | str,
+    embeddings_filepath: Path | str | None = None,
+    embedding_model_name: str = "text-embedding-3-large",
+    batch_size: int = 100,
+    delay_between_batches: float = 1.0,
+    encoding_format: Literal["float", "base64"] = "base64",
+) -> NDArray[np.float32]:
+    """Get embeddings for a list of texts using OpenAI API as a resumable job.
+
+    Each completed batch is flushed to the job folder (see `EmbeddingJob`), so
+    rerunning after a crash or interruption only sends the batches still
+    pending. Embeddings are never held as Python lists beyond a single batch.
+
+    Args:
+        texts (list[str]): List of texts to get embeddings for.
+        job_folder (Path | str): Folder holding the job manifest and shard file.
+        embeddings_filepath (Path | str | None, optional): Path of the assembled `.npy` file.
+            Defaults to "embeddings.npy" in the job folder.
+        embedding_model_name (str, optional): Embedding model to use. Defaults to "text-embedding-3-large".
+        batch_size (int, optional): Number of texts to process in each batch. Defaults to 100.
+        delay_between_batches (float, optional): Delay in seconds between batches. Defaults to 1.0.
+        encoding_format (Literal["float", "base64"], optional): Encoding requested to the API. Defaults to "base64".
+
+    Returns:
+        NDArray[np.float32]: Memory-mapped embedding matrix, one row per text.
+
+    Raises:
+        ValueError: If the 'texts' list is empty, or the job folder holds another job.
+        Exception: For any errors during API calls (completed batches are kept).
+
+    """
+    # Raise error if texts is empty
+    if not texts:
+        error_msg: str = "The 'texts' list is empty. Please provide at least one text."
+        raise ValueError(error_msg)
+
+    # Remove newlines from texts to improve consistency
+    cleaned_texts: list[str] = [text.replace("\n", " ") for text in texts]
+
+    # Open (or resume) job
+    job = EmbeddingJob(job_folder, cleaned_texts, embedding_model_name, batch_size)
+    pending: list[int] = job.pending_batches()
+
+    # Process pending batches
+    for n, batch_index in enumerate(pending):
+
+        # Get the current batch
+        start, end = job.batch_bounds(batch_index)
+
+        try:
+            # Call OpenAI API for the batch
+            response = get_openai_client().embeddings.create(
+                input=cleaned_texts[start:end], model=embedding_model_name, encoding_format=encoding_format
+            )
+
+            # Flush batch embeddings to disk
+            job.write_batch(batch_index, response_to_array_(response.data))
+
+            # Add delay between batches to avoid rate limiting
+            if n < len(pending) - 1:
+                time.sleep(delay_between_batches)
+
+        except Exception as e:
+            print(f"Error processing batch {batch_index + 1}: {e}. Run again to resume.")
+            raise
+
+    return job.assemble(embeddings_filepath or job.folder / "embeddings.npy")
+
+
+def estimate_tokens_(text: str) -> int:
+    """Estimate the number of tokens of a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def pack_batches_(texts: list[str], batch_size: int, max_batch_tokens: int) -> list[tuple[int, int]]:
+    """Pack consecutive texts into batches bounded by size and estimated tokens.
+
+    Args:
+        texts (list[str]): List of texts to pack.
+        batch_size (int): Maximum number of texts per batch.
+        max_batch_tokens (int): Maximum number of estimated tokens per batch.
+
+    Returns:
+        list[tuple[int, int]]: Start and end index of each batch.
+
+    """
+    batches: list[tuple[int, int]] = []
+    start: int = 0
+    tokens: int = 0
+
+    for i, text in enumerate(texts):
+        text_tokens: int = estimate_tokens_(text)
+        # Close the current batch if the text does not fit
+        if i > start and (i - start >= batch_size or tokens + text_tokens > max_batch_tokens):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += text_tokens
+
+    if start < len(texts):
+        batches.append((start, len(texts)))
+
+    return batches
+
+
+def parse_duration_(value: str | None) -> float | None:
+    """Parse a rate limit duration header (e.g., "1.5", "20ms", "6m0s") into seconds."""
+    if not value:
+        return None
+
+    # Plain number of seconds
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units: dict[str, float] = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts: list[tuple[str, str]] = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    return sum(float(amount) * units[unit] for amount, unit in parts) if parts else None
+
+
+def get_retry_after_(headers: Any) -> float | None:
+    """Get the number of seconds to wait before retrying from rate limit headers."""
+    retry_after_ms: float | None = parse_duration_(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    return (
+        parse_duration_(headers.get("retry-after"))
+        or parse_duration_(headers.get("x-ratelimit-reset-tokens"))
+        or parse_duration_(headers.get("x-ratelimit-reset-requests"))
+    )
+
+
+class AdaptiveConcurrency:
+    """Concurrency window shared by concurrent requests, adapted to rate limiting.
+
+    The window is halved (and all requests paused) on each 429 response and
+    grows back by one request per window of successful responses, up to the
+    configured maximum.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.max_concurrency: int = max_concurrency
+        self.window: float = float(max_concurrency)
+        self.in_flight: int = 0
+        self.resume_at: float = 0.0
+        self.condition: asyncio.Condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot in the window and for any rate limit pause to end."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+
+        delay: float = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, throttled: bool = False, pause: float | None = None) -> None:
+        """Free a slot, shrinking the window when throttled and growing it otherwise.
+
+        Args:
+            throttled (bool): Whether the request was rate limited.
+            pause (float | None): Seconds all requests should wait before the next call.
+
+        """
+        async with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.window = max(1.0, self.window / 2)
+            else:
+                self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+            if pause:
+                self.resume_at = max(self.resume_at, time.monotonic() + pause)
+            self.condition.notify_all()
+
+
+async def get_openai_embeddings_async(  # noqa: PLR0913, PLR0915
     texts: list[str],
+    embedding_model_name: str = "text-embedding-3-large",
+    batch_size: int = 100,
+    max_batch_tokens: int = 250_000,
+    max_concurrency: int = 8,
+    max_retries: int = 6,
+    client: "AsyncOpenAI | None" = None,
+    cache: EmbeddingCache | None = None,
+) -> tuple[str, list[list[float]]]:
+    """Get embeddings for a list of texts using concurrent OpenAI API requests.
+
+    Texts are packed into batches bounded by `batch_size` and an estimate of
+    their tokens, and sent concurrently within an adaptive window. A 429
+    response halves the window and pauses all requests for the time given by
+    the rate limit headers (or an exponential backoff). Only the failed batch
+    is retried.
+
+    To test against a local mock server, pass a client built with
+    `AsyncOpenAI(base_url="http://127.0.0.1:8000/v1", api_key="mock")`, or set
+    `OPENAI_BASE_URL`.
+
+    Args:
+        texts (list[str]): List of texts to get embeddings for.
+        embedding_model_name (str, optional): Embedding model to use. Defaults to "text-embedding-3-large".
+        batch_size (int, optional): Maximum number of texts in each batch. Defaults to 100.
+        max_batch_tokens (int, optional): Maximum number of estimated tokens in each batch. Defaults to 250_000.
+        max_concurrency (int, optional): Maximum number of concurrent requests. Defaults to 8.
+        max_retries (int, optional): Maximum number of retries of each batch. Defaults to 6.
+        client (AsyncOpenAI | None, optional): OpenAI async client. Defaults to a client built from env vars.
+        cache (EmbeddingCache | None, optional): Cache of the model; only texts not cached are sent. Defaults to None.
+
+    Returns:
+        tuple[str, list[list[float]]]: Embedding model name and embedding vectors.
+
+    Raises:
+        ValueError: If the 'texts' list is empty, or the cache belongs to another model.
+        Exception: For any errors during API calls, once retries are exhausted.
+
+    """
+    # Raise error if texts is empty
+    if not texts:
+        error_msg: str = "The 'texts' list is empty. Please provide at least one text."
+        raise ValueError(error_msg)
+
+    # Embed only texts not cached
+    if cache is not None:
+        check_cache_model_(cache, embedding_model_name)
+        missing: list[str] = cache.missing(texts)
+        if missing:
+            _, missing_embeddings = await get_openai_embeddings_async(
+                missing, embedding_model_name, batch_size, max_batch_tokens, max_concurrency, max_retries, client
+            )
+            cache.put(missing, missing_embeddings)
+        return embedding_model_name, cache.get(texts).tolist()
+
+    # Import openai on first use
+    from openai import (  # noqa: PLC0415
+        APIConnectionError,
+        APITimeoutError,
+        AsyncOpenAI,
+        InternalServerError,
+        RateLimitError,
+    )
+
+    # Rate limiting is handled here, not by the client
+    if client is not None:
+        client = client.with_options(max_retries=0)
+    else:
+        load_env_()
+        client = AsyncOpenAI(api_key=getenv("OPENAI_APIKEY"), max_retries=0)
+
+    # Remove newlines from texts to improve consistency
+    cleaned_texts: list[str] = [text.replace("\n", " ") for text in texts]
+
+    # Pack texts into batches
+    batches: list[tuple[int, int]] = pack_batches_(cleaned_texts, batch_size, max_batch_tokens)
+
+    # Init list to hold embeddings of each batch
+    batch_embeddings: list[list[list[float]]] = [[] for _ in batches]
+
+    # Estimated tokens of each batch
+    batch_tokens: list[int] = [
+        sum(estimate_tokens_(text) for text in cleaned_texts[start:end]) for start, end in batches
+    ]
+
+    concurrency = AdaptiveConcurrency(max_concurrency)
+
+    async def embed_batch_(batch_index: int) -> None:
+        """Embed a batch, retrying it on rate limiting and transient errors."""
+        start, end = batches[batch_index]
+
+        for attempt in range(max_retries + 1):
+            await concurrency.acquire()
+            try:
+                # Call OpenAI API for the batch
+                raw_response = await client.embeddings.with_raw_response.create(
+                    input=cleaned_texts[start:end], model=embedding_model_name
+                )
+            except RateLimitError as e:
+                backoff: float = 2 ** attempt + random.random()  # noqa: S311
+                await concurrency.release(throttled=True, pause=get_retry_after_(e.response.headers) or backoff)
+                if attempt == max_retries:
+                    print(f"Error processing batch {batch_index + 1}: {e}")
+                    raise
+            except (APIConnectionError, APITimeoutError, InternalServerError) as e:
+                await concurrency.release(pause=2 ** attempt + random.random())  # noqa: S311
+                if attempt == max_retries:
+                    print(f"Error processing batch {batch_index + 1}: {e}")
+                    raise
+            except Exception as e:
+                await concurrency.release()
+                print(f"Error processing batch {batch_index + 1}: {e}")
+                raise
+            else:
+                # Pause proactively when the token budget would not fit another batch
+                remaining_tokens: str | None = raw_response.headers.get("x-ratelimit-remaining-tokens")
+                pause: float | None = None
+                if remaining_tokens is not None and int(remaining_tokens) < batch_tokens[batch_index]:
+                    pause = parse_duration_(raw_response.headers.get("x-ratelimit-reset-tokens"))
+                await concurrency.release(pause=pause)
+
+                # Extract embeddings from response
+                response = raw_response.parse()
+                batch_embeddings[batch_index] = [data.embedding for data in response.data]
+                return
+
+    # Embed all batches concurrently, cancel pending batches on failure
+    tasks: list[asyncio.Task] = [asyncio.ensure_future(embed_batch_(i)) for i in range(len(batches))]
+    try:
+        await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return embedding_model_name, [embedding for batch in batch_embeddings for embedding in batch]
+
+
+def get_embedding_model_id(model_name: str, backend: Backend = "torch") -> str:
+    """Get the id of the embeddings of a model run with a backend (e.g., to name its cache).
+
+    Args:
+        model_name (str): Name of the model.
+        backend (Backend, optional): Inference backend. Defaults to "torch".
+
+    Returns:
+        str: Model name, suffixed with the backend unless it is the fp32 PyTorch one.
+
+    """
+    return model_name if backend == "torch" else f"{model_name}-{backend}"
+
+
+def get_all_minilm_l6_v2_embeddings(  # noqa: PLR0913
+    texts: list[str],
+    cache: EmbeddingCache | None = None,
+    batch_size: int = 32,
+    sort_by_length: bool = False,
+    n_processes: int | None = None,
+    chunk_size: int | None = None,
+    backend: Backend = "torch",
 ) -> NDArray:
     """Get MiniLM L6 v2 embeddings for a list of texts using SentenceTransformer.
 
+    With `sort_by_length`, texts are encoded shortest first so each batch (and
+    each chunk sent to a worker process) holds texts of similar length and
+    little padding, then embeddings are put back in the original order. With
+    `n_processes` > 1, encoding runs on a pool of CPU worker processes.
+
     Args:
         texts (list[str]): List of texts to get embeddings for.
+        cache (EmbeddingCache | None, optional): Cache of the model; only texts not cached are encoded. Defaults to None.
+        batch_size (int, optional): Number of texts encoded in each batch. Defaults to 32.
+        sort_by_length (bool, optional): Encode texts sorted by length. Defaults to False.
+        n_processes (int | None, optional): Number of CPU worker processes. Defaults to a single process.
+        chunk_size (int | None, optional): Number of texts sent to a worker at a time. Defaults to SentenceTransformer's choice.
+        backend (Backend, optional): Inference backend (see `lib.utils_models`). Defaults to "torch".
 
     Returns:
         NDArray: Array of embedding vectors.
 
+    Raises:
+        ValueError: If the cache belongs to another model or backend.
+
     """
-    # Load the MiniLM L6 v2 model
-    sentence_model = SentenceTransformer("all-MiniLM-L6-v2")
+    # Encode only texts not cached
+    if cache is not None:
+        check_cache_model_(cache, get_embedding_model_id("all-MiniLM-L6-v2", backend))
+        return cache.get_or_compute(
+            texts,
+            lambda missing: get_all_minilm_l6_v2_embeddings(
+                missing, None, batch_size, sort_by_length, n_processes, chunk_size, backend
+            ),
+        )
+
+    # Get the MiniLM L6 v2 model (loaded once per process)
+    sentence_model = get_sentence_transformer("all-MiniLM-L6-v2", backend=backend)
+
+    # Sort texts by length
+    order: NDArray[np.intp] | None = None
+    if sort_by_length:
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        texts = [texts[i] for i in order]
 
     # Compute embeddings
-    return sentence_model.encode(texts, show_progress_bar=False)
+    if n_processes and n_processes > 1:
+        pool = sentence_model.start_multi_process_pool(target_devices=["cpu"] * n_processes)
+        try:
+            embeddings: NDArray = sentence_model.encode(
+                texts, pool=pool, batch_size=batch_size, chunk_size=chunk_size, show_progress_bar=False
+            )
+        finally:
+            sentence_model.stop_multi_process_pool(pool)
+    else:
+        embeddings = sentence_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+    # Restore original order
+    if order is not None:
+        restored: NDArray = np.empty_like(embeddings)
+        restored[order] = embeddings
+        embeddings = restored
+
+    return embeddings
+
+
+def check_embedding_parity(
+    texts: list[str],
+    backend: Backend,
+    reference_backend: Backend = "torch",
+    batch_size: int = 32,
+) -> dict[str, float]:
+    """Compare MiniLM L6 v2 embeddings of a backend against a reference backend.
+
+    Args:
+        texts (list[str]): Sample of texts to encode.
+        backend (Backend): Backend to check.
+        reference_backend (Backend, optional): Reference backend. Defaults to "torch".
+        batch_size (int, optional): Number of texts encoded in each batch. Defaults to 32.
+
+    Returns:
+        dict[str, float]: Mean, 1st percentile and min cosine similarity between
+        paired embeddings, encoding time of both backends and speedup.
+
+    """
+    timings: dict[Backend, float] = {}
+    embeddings: dict[Backend, NDArray] = {}
+
+    for name in (reference_backend, backend):
+        # Load model outside of timing
+        get_sentence_transformer("all-MiniLM-L6-v2", backend=name)
+        start: float = time.perf_counter()
+        embeddings[name] = get_all_minilm_l6_v2_embeddings(texts, batch_size=batch_size, backend=name)
+        timings[name] = time.perf_counter() - start
+
+    # Cosine similarity of paired embeddings
+    reference: NDArray = embeddings[reference_backend]
+    candidate: NDArray = embeddings[backend]
+    cosine: NDArray = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+
+    return {
+        "cosine_mean": float(cosine.mean()),
+        "cosine_p01": float(np.percentile(cosine, 1)),
+        "cosine_min": float(cosine.min()),
+        "reference_seconds": timings[reference_backend],
+        "backend_seconds": timings[backend],
+        "speedup": timings[reference_backend] / timings[backend],
+    }
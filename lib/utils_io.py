@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pandas as pd
+
+from lib.utils_pandas import make_doc_ids
+
+
+def arrow_types_mapper_(arrow_type: object) -> pd.api.extensions.ExtensionDtype | None:
+    """Map Arrow string types to the Arrow-backed pandas string dtype (other types keep their default)."""
+    import pyarrow as pa  # noqa: PLC0415
+
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def to_arrow_strings_(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the text columns of a DataFrame to the Arrow-backed string dtype.
+
+    Only object columns holding strings are converted; other object columns
+    (e.g., lists of words) are left for Arrow to store natively.
+    """
+    text_columns: list[str] = [
+        column for column in df.columns
+        if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) == "string"
+    ]
+    return df.astype(dict.fromkeys(text_columns, "string[pyarrow]")) if text_columns else df
+
+
+def write_dataset(df: pd.DataFrame, filepath: Path | str, csv: bool = False) -> Path:
+    """Write a dataset as Parquet, the interchange format between pipeline stages.
+
+    The file is written to a temporary path and then moved in place, so
+    readers never see a partial file.
+
+    Args:
+        df (pd.DataFrame): Dataset to write.
+        filepath (Path | str): Parquet file to write (the suffix is set to `.parquet`).
+        csv (bool, optional): Also export the dataset as CSV next to the Parquet file. Defaults to False.
+
+    Returns:
+        Path: Path of the Parquet file.
+
+    """
+    filepath = Path(filepath).with_suffix(".parquet")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write Parquet, then replace the existing file
+    tmp_path: Path = filepath.with_suffix(".parquet.tmp")
+    to_arrow_strings_(df).to_parquet(tmp_path, engine="pyarrow", index=False)
+    tmp_path.replace(filepath)
+
+    # Export CSV side output
+    if csv:
+        df.to_csv(filepath.with_suffix(".csv"), index=False)
+
+    return filepath
+
+
+def read_dataset(filepath: Path | str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read a dataset written by `write_dataset`, loading only the given columns.
+
+    Text columns are loaded with the Arrow-backed string dtype. Datasets only
+    available as CSV (written before the switch to Parquet) are read from CSV,
+    with doc ids made by `make_doc_ids` if the CSV predates them.
+
+    Args:
+        filepath (Path | str): Parquet file of the dataset (or its CSV counterpart).
+        columns (list[str] | None, optional): Columns to load. Defaults to None (all columns).
+
+    Returns:
+        pd.DataFrame: Dataset.
+
+    Raises:
+        FileNotFoundError: If neither the Parquet file nor the CSV file exists.
+
+    """
+    parquet_path: Path = Path(filepath).with_suffix(".parquet")
+    csv_path: Path = parquet_path.with_suffix(".csv")
+
+    # Read Parquet (only the requested columns are decoded)
+    if parquet_path.exists():
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        return pq.read_table(parquet_path, columns=columns).to_pandas(types_mapper=arrow_types_mapper_)
+
+    # Read legacy CSV (ids are kept as text)
+    if csv_path.exists():
+        csv_columns: pd.Index = pd.read_csv(csv_path, nrows=0).columns
+        if "doc_id" in csv_columns or (columns is not None and "doc_id" not in columns):
+            df: pd.DataFrame = pd.read_csv(csv_path, usecols=columns, dtype={"doc_id": str})
+            return to_arrow_strings_(df)
+
+        # Make doc ids of CSVs written before them, as the dataset stage does
+        df = pd.read_csv(csv_path)
+        df["doc_id"] = make_doc_ids(df)
+        return to_arrow_strings_(df[columns] if columns is not None else df)
+
+    error_msg: str = f"No dataset at '{parquet_path}' (nor '{csv_path}')."
+    raise FileNotFoundError(error_msg)
@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Literal, get_args
+
+# sentence_transformers (and torch) are imported on first load
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Inference backends:
+# - torch: PyTorch fp32 (reference)
+# - torch-int8: PyTorch with int8 dynamic quantization of linear layers (CPU only)
+# - onnx: ONNX Runtime fp32 (requires `optimum[onnxruntime]`)
+# - onnx-int8: ONNX Runtime with the int8 quantized export shipped with the model
+Backend = Literal["torch", "torch-int8", "onnx", "onnx-int8"]
+
+# ONNX file of the int8 quantized export (AVX2 is available on all our CPU nodes)
+onnx_int8_file_name: str = "onnx/model_quint8_avx2.onnx"
+
+# Models loaded in this process, by (model name, device, backend)
+loaded_models: dict[tuple[str, str | None, Backend], "SentenceTransformer"] = {}
+
+# Load time in seconds of each model
+model_load_times: dict[tuple[str, str | None, Backend], float] = {}
+
+# Guard against concurrent loads of the same model
+models_lock: threading.Lock = threading.Lock()
+
+
+def load_sentence_transformer_(
+    model_name: str,
+    device: str | None,
+    backend: Backend,
+) -> "SentenceTransformer":
+    """Load a SentenceTransformer model with the given inference backend.
+
+    Raises:
+        ValueError: If the backend is not supported, or does not run on the device.
+
+    """
+    from sentence_transformers import SentenceTransformer  # noqa: PLC0415
+
+    # Raise error if backend is not supported
+    if backend not in get_args(Backend):
+        error_msg: str = f"Unsupported backend '{backend}'."
+        raise ValueError(error_msg)
+
+    # Raise error if the device cannot run the backend (dynamic quantization runs on CPU only)
+    if backend == "torch-int8" and device not in (None, "cpu"):
+        error_msg = f"The torch-int8 backend runs on CPU only, not on '{device}'."
+        raise ValueError(error_msg)
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+
+    if backend == "torch-int8":
+        import torch  # noqa: PLC0415
+
+        model: SentenceTransformer = torch.ao.quantization.quantize_dynamic(
+            SentenceTransformer(model_name, device="cpu"), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        return model
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device=device, backend="onnx")
+
+    return SentenceTransformer(
+        model_name, device=device, backend="onnx", model_kwargs={"file_name": onnx_int8_file_name}
+    )
+
+
+def get_sentence_transformer(
+    model_name: str = "all-MiniLM-L6-v2",
+    device: str | None = None,
+    backend: Backend = "torch",
+) -> "SentenceTransformer":
+    """Get a SentenceTransformer model, loading it once per process.
+
+    The model is loaded lazily on first request (thread-safe) and shared by
+    every later caller, e.g. the embedding utilities and the BERTopic factories.
+
+    Args:
+        model_name (str, optional): Name of the model. Defaults to "all-MiniLM-L6-v2".
+        device (str | None, optional): Device to load the model on. Defaults to SentenceTransformer's choice.
+        backend (Backend, optional): Inference backend. Defaults to "torch".
+
+    Returns:
+        SentenceTransformer: Loaded model.
+
+    Raises:
+        ValueError: If the backend is not supported, or does not run on the device.
+
+    """
+    key: tuple[str, str | None, Backend] = (model_name, device, backend)
+
+    # Fast path: already loaded
+    model: SentenceTransformer | None = loaded_models.get(key)
+    if model is not None:
+        return model
+
+    with models_lock:
+        # Check again, another thread may have loaded it meanwhile
+        model = loaded_models.get(key)
+        if model is None:
+            start: float = time.perf_counter()
+            model = load_sentence_transformer_(model_name, device, backend)
+            model_load_times[key] = time.perf_counter() - start
+            loaded_models[key] = model
+            print(f"Loaded {model_name} ({backend}) in {model_load_times[key]:.2f}s")
+
+    return model
+
+
+def get_model_load_times() -> dict[str, float]:
+    """Get the load time in seconds of the models loaded in this process.
+
+    Returns:
+        dict[str, float]: Load time by model name, backend (and device, if given).
+
+    """
+    return {
+        f"{model_name} ({backend})" if device is None else f"{model_name} ({backend}, {device})": seconds
+        for (model_name, device, backend), seconds in model_load_times.items()
+    }
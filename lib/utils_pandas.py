@@ -1,10 +1,47 @@
-from typing import TYPE_CHECKING
+import functools
+import hashlib
+import re
+from collections.abc import Callable, Iterable, Iterator
 
 import numpy as np
 import pandas as pd
 
-if TYPE_CHECKING:
-    from collections.abc import Callable
+from lib.utils_trends import TopicTrends
+
+# Abbreviations to clean up (pattern -> replacement)
+abbreviations: dict[str, str | Callable[[re.Match[str]], str]] = {
+    r"\bet al\.": "et al",
+    r"\be\.g\.": "eg",
+    r"\bi\.e\.": "ie",
+    r"\bcf\.": "cf",
+    r"\bviz\.": "viz",
+    r"\bvs\.": "vs",
+    r"\bca\.": "ca",
+    r"\bc\.": "c",
+    r"\bibid\.": "ibid",
+    r"\bop\. cit\.": "op cit",
+    r"\bloc\. cit\.": "loc cit",
+    r"\bq\.v\.": "qv",
+    r"\b[Nn]\.?[Bb]\.": "NB",
+    r"\b[Pp]\.?[Ss]\.": "PS",
+    r"\bff\.": "ff",
+    r"\bpp\.": "pp",
+    r"\bvols?\.": lambda m: m.group().replace(".", ""),
+    r"\beds?\.": lambda m: m.group().replace(".", ""),
+    r"\btrans\.": "trans",
+    r"\brev\.": "rev",
+    r"\brepr\.": "repr"
+}
+
+# Single alternation of all abbreviations (shared leading \b and trailing \. factored out)
+abbreviations_pattern: re.Pattern[str] = re.compile(
+    r"\b(?:"
+    + "|".join(pattern.removeprefix(r"\b").removesuffix(r"\.") for pattern in abbreviations)
+    + r")\."
+)
+
+# Sentence boundary
+sentence_split_pattern: re.Pattern[str] = re.compile(r"\.\s+")
 
 
 def check_columns_(df: pd.DataFrame, columns: list[str]) -> None:
@@ -27,6 +64,50 @@ def check_columns_(df: pd.DataFrame, columns: list[str]) -> None:
         raise ValueError(error_msg)
 
 
+@functools.lru_cache(maxsize=1024)
+def abbreviation_replacement_(abbreviation: str) -> str:
+    """Get the replacement of an abbreviation from the first pattern of `abbreviations` matching it."""
+    for pattern, replacement in abbreviations.items():
+        match = re.fullmatch(pattern, abbreviation)
+        if match:
+            return replacement if isinstance(replacement, str) else replacement(match)
+    return abbreviation
+
+
+def expand_abbreviation_(match: re.Match[str]) -> str:
+    """Get the replacement for an abbreviation matched by `abbreviations_pattern`."""
+    return abbreviation_replacement_(match.group())
+
+
+def make_excerpt_text_(text: str, num_sentences: int) -> str:
+    """Clean up abbreviations in text and keep its first sentences.
+
+    Equivalent to replacing each abbreviation in turn, splitting on sentence
+    boundaries and joining the first `num_sentences` sentences with ". ",
+    but scans the text once and stops splitting after the needed sentences.
+    Only abbreviations glued together without whitespace (e.g., "viz.vols.")
+    may be expanded differently.
+
+    Args:
+        text (str): Text to make the excerpt from.
+        num_sentences (int): Number of sentences to keep.
+
+    Returns:
+        str: Excerpt (empty string if there is no text).
+
+    """
+    # Clean up abbreviations
+    text = abbreviations_pattern.sub(expand_abbreviation_, text)
+
+    # Split only as much as needed
+    sentences: list[str] = sentence_split_pattern.split(text, maxsplit=max(num_sentences, 0))
+
+    # Join first sentences
+    excerpt: str = ". ".join(sentences[:num_sentences]) + "."
+
+    return "" if excerpt == "." else excerpt
+
+
 def make_excerpt(
         df: pd.DataFrame,
         column: str = "abstract",
@@ -53,46 +134,11 @@ def make_excerpt(
     # Check if column is present in df
     check_columns_(df, [column])
 
-    # Dictionary of abbreviations to clean up
-    abbrev_dict: dict[str, str | Callable] = {
-        r"\bet al\.": "et al",
-        r"\be\.g\.": "eg",
-        r"\bi\.e\.": "ie",
-        r"\bcf\.": "cf",
-        r"\bviz\.": "viz",
-        r"\bvs\.": "vs",
-        r"\bca\.": "ca",
-        r"\bc\.": "c",
-        r"\bibid\.": "ibid",
-        r"\bop\. cit\.": "op cit",
-        r"\bloc\. cit\.": "loc cit",
-        r"\bq\.v\.": "qv",
-        r"\b[Nn]\.?[Bb]\.": "NB",
-        r"\b[Pp]\.?[Ss]\.": "PS",
-        r"\bff\.": "ff",
-        r"\bpp\.": "pp",
-        r"\bvols?\.": lambda m: m.group().replace(".", ""),
-        r"\beds?\.": lambda m: m.group().replace(".", ""),
-        r"\btrans\.": "trans",
-        r"\brev\.": "rev",
-        r"\brepr\.": "repr"
-    }
-
     # Fill NaN values with empty strings
     excerpt: pd.Series = df[column].replace("[No abstract available]", np.nan).fillna("")
 
-    # Apply abbreviation replacements
-    for pattern, replacement in abbrev_dict.items():
-        excerpt = excerpt.str.replace(pattern, replacement, regex=True)
-
-    return (
-       excerpt
-            .str.split(r"\.\s+", regex=True)
-            .str[:num_paragraphs]
-            .str.join(". ")
-            .add(".")
-            .str.replace(r"^\.$", "", regex=True)
-    )
+    # Apply abbreviation replacements (single pass) and keep first sentences
+    return excerpt.map(functools.partial(make_excerpt_text_, num_sentences=num_paragraphs))
 
 
 def make_text_to_embed(df: pd.DataFrame, columns: list[str] | None = None) -> pd.Series:
@@ -117,24 +163,98 @@ def make_text_to_embed(df: pd.DataFrame, columns: list[str] | None = None) -> pd
     # Raise error if columns are not present in df (use pd.index intersection)
     check_columns_(df, columns)
 
-    # Fill NaN values with empty strings
-    text_to_embed: pd.DataFrame = df[columns].fillna("")
+    # Init list of tagged columns
+    tagged: list[pd.Series] = []
 
     # Iterate over columns
     for col in columns:
-        # Wrap the text in tags
-        text_to_embed[col] = f"<{col}>" + text_to_embed[col] + f"</{col}>"
-        # Remove empty tags
-        text_to_embed[col] = text_to_embed[col].str.replace(rf"<{col}>\.?</{col}>", "", regex=True)
+        # Fill NaN values with empty strings
+        text: pd.Series = df[col].fillna("")
+        # Wrap the text in tags, empty texts (or a lone dot) get no tags
+        tagged.append((f"<{col}>" + text + f"</{col}>").where(~text.isin(["", "."]), ""))
+
+    # Join columns row-wise
+    text_to_embed: pd.Series = tagged[0].str.cat(tagged[1:], sep=" ") if len(tagged) > 1 else tagged[0]
+
+    return text_to_embed.str.strip()
+
 
-    return text_to_embed.agg(" ".join, axis=1).str.strip()
+def iter_text_to_embed(
+        chunks: Iterable[pd.DataFrame],
+        columns: list[str] | None = None,
+    ) -> Iterator[pd.Series]:
+    """Prepare text for embedding chunk by chunk, for corpora that do not fit in one DataFrame.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): DataFrame chunks (e.g., `pd.read_csv(..., chunksize=100_000)`).
+        columns (list[str]): List of column names to be combined for embedding.
+
+    Yields:
+        pd.Series: Series containing the text ready for embedding, one per chunk.
+
+    Raises:
+        ValueError: If any of the specified columns are not present in a chunk.
+
+    """
+    for chunk in chunks:
+        yield make_text_to_embed(chunk, columns)
+
+
+def make_doc_ids(
+        df: pd.DataFrame,
+        id_column: str = "eid",
+        key_columns: list[str] | None = None,
+    ) -> pd.Series:
+    """Create stable document ids, independent of row position.
+
+    Documents get the value of `id_column` (e.g., the Scopus EID) when it is
+    available, otherwise a hash of the (lowercased, whitespace-collapsed)
+    values of `key_columns`.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the documents.
+        id_column (str): Name of the column holding native ids (default is "eid").
+        key_columns (list[str]): Columns identifying a document when there is no native id
+            (default is ["title", "year"]).
+
+    Returns:
+        pd.Series: Series containing the document ids.
+
+    Raises:
+        ValueError: If key columns are missing, or ids are not unique.
+
+    """
+    # Default key columns to title and year if not specified
+    if not key_columns:
+        key_columns = ["title", "year"]
+
+    # Check if key columns are present in df
+    check_columns_(df, key_columns)
+
+    # Hash normalized key columns
+    keys: pd.Series = df[key_columns].astype(str).agg("\x00".join, axis=1)
+    keys = keys.str.lower().str.split().str.join(" ")
+    doc_ids: pd.Series = keys.map(lambda key: hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+
+    # Prefer native ids where available
+    if id_column in df.columns:
+        doc_ids = df[id_column].astype("string").fillna(doc_ids).astype(str)
+
+    # Raise error if ids are not unique
+    duplicated: pd.Series = doc_ids[doc_ids.duplicated()]
+    if not duplicated.empty:
+        error_msg: str = f"{duplicated.size} document ids are not unique (e.g., '{duplicated.iloc[0]}')."
+        raise ValueError(error_msg)
+
+    return doc_ids.rename("doc_id")
 
 
 def get_topics_in_period(
         df: pd.DataFrame,
         topics_info: pd.DataFrame,
         period: tuple[int, int],
-        max_topics: int = 5
+        max_topics: int = 5,
+        trends: TopicTrends | None = None,
     ) -> pd.DataFrame:
     """Get the most prevalent topics in a specified time period.
 
@@ -143,29 +263,39 @@ def get_topics_in_period(
         topics_info (pd.DataFrame): DataFrame containing the topic information.
         period (tuple[int, int]): Tuple specifying the start and end year of the period.
         max_topics (int): Maximum number of topics to return (default is 5).
+        trends (TopicTrends | None): Year x topic counts of df, to answer the query without
+            scanning df (default is None, df is filtered and grouped).
 
     Returns:
         pd.DataFrame: DataFrame containing the topics in the specified period.
 
     """
-    # Define period mask
-    period_mask: pd.Series[np.bool_] = df.year.between(*period)
-
-    # Filter df by period
-    df_period: pd.DataFrame = df[period_mask]
-
-    # Find n largest topics
-    topics_in_period: list[int] = (
-        df_period
-            .groupby("topic")
-            .size()
-            # Get the most prevalent topics
-            # Increase by one, in case -1 topic (uncategorized) is present
-            .nlargest(max_topics + 1)
-            .drop(-1, errors="ignore")
-            .index
-            .to_list()
-    )
+    # Find n largest topics from precomputed counts
+    # Increase by one, in case -1 topic (uncategorized) is present
+    if trends is not None:
+        topics_in_period: list[int] = [
+            topic for topic in trends.top_topics(period, max_topics + 1) if topic != -1
+        ]
+
+    else:
+        # Define period mask
+        period_mask: pd.Series[np.bool_] = df.year.between(*period)
+
+        # Filter df by period
+        df_period: pd.DataFrame = df[period_mask]
+
+        # Find n largest topics
+        topics_in_period = (
+            df_period
+                .groupby("topic")
+                .size()
+                # Get the most prevalent topics
+                # Increase by one, in case -1 topic (uncategorized) is present
+                .nlargest(max_topics + 1)
+                .drop(-1, errors="ignore")
+                .index
+                .to_list()
+        )
 
     # Get topic info for topics in period
     # Exclude -1 Topic (uncategorized)
@@ -0,0 +1,343 @@
+import ast
+import hashlib
+import subprocess
+import sys
+import time
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import orjson
+
+
+class Stage(NamedTuple):
+    """Stage of the pipeline: a script run headless, with the files it reads and writes.
+
+    Inputs and outputs are files or folders. A stage depends on every stage
+    writing one of its inputs (or a folder containing it).
+    """
+
+    name: str
+    script: Path
+    inputs: list[Path]
+    outputs: list[Path]
+
+
+class StageRun(NamedTuple):
+    """Outcome of a stage in a pipeline run."""
+
+    name: str
+    status: str
+    seconds: float
+
+
+class FileHasher:
+    """Content hasher of files and folders, memoized by (size, mtime).
+
+    Hashes are kept in `memo` (path -> [size, mtime_ns, sha256]), so large
+    unchanged files (e.g., embeddings) are only read when they change.
+    """
+
+    def __init__(self, memo: dict[str, list[Any]] | None = None) -> None:
+        self.memo: dict[str, list[Any]] = memo if memo is not None else {}
+
+    def hash_file_(self, path: Path) -> str:
+        """Get the content hash of a file."""
+        stat = path.stat()
+        key: str = path.as_posix()
+        cached: list[Any] | None = self.memo.get(key)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return str(cached[2])
+
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.memo[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def hash_files(self, paths: list[Path]) -> dict[str, str]:
+        """Get the content hash of each file of files and folders (a missing path hashes as "missing").
+
+        Args:
+            paths (list[Path]): Files and folders.
+
+        Returns:
+            dict[str, str]: Content hash, by file path (in the order of the paths, folders listed sorted).
+
+        """
+        hashes: dict[str, str] = {}
+        for path in paths:
+            files: list[Path] = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+            for file in files:
+                hashes[file.as_posix()] = self.hash_file_(file) if file.exists() else "missing"
+        return hashes
+
+    def hash_paths(self, paths: list[Path]) -> str:
+        """Get the content hash of files and folders (a missing path hashes as missing).
+
+        Args:
+            paths (list[Path]): Files and folders.
+
+        Returns:
+            str: Hex digest of the SHA-256 hash of the paths and their content.
+
+        """
+        digest = hashlib.sha256()
+        for path in paths:
+            for file, file_hash in self.hash_files([path]).items():
+                digest.update(file.encode("utf-8"))
+                digest.update(file_hash.encode())
+        return digest.hexdigest()
+
+
+def is_within_(path: Path, folder: Path) -> bool:
+    """Check whether a path is a folder or lies within it."""
+    return path == folder or folder in path.parents
+
+
+def get_module_inputs(script: Path, package: str = "lib", root: Path | None = None) -> list[Path]:
+    """Get the files of the package modules a script imports, directly or through other modules of the package.
+
+    Imports are read statically (also the ones inside functions), so stage
+    inputs follow the code without listing its modules by hand.
+
+    Args:
+        script (Path): Script of the stage, relative to the root.
+        package (str, optional): Top-level package whose modules are inputs. Defaults to "lib".
+        root (Path | None, optional): Folder the package is imported from. Defaults to the current folder.
+
+    Returns:
+        list[Path]: Module files, relative to the root, sorted.
+
+    """
+    root = root if root is not None else Path()
+    modules: set[Path] = set()
+    pending: list[Path] = [script]
+    while pending:
+        tree: ast.Module = ast.parse((root / pending.pop()).read_text(encoding="utf-8"))
+
+        # Get imported names (for `from a import b`, b may be a module too)
+        names: list[str] = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names.append(node.module)
+                names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+
+        # Follow modules of the package not seen yet
+        for name in names:
+            if name.split(".", maxsplit=1)[0] != package:
+                continue
+            module_path: Path = Path(*name.split("."))
+            for path in (module_path.with_suffix(".py"), module_path / "__init__.py"):
+                if (root / path).is_file() and path not in modules:
+                    modules.add(path)
+                    pending.append(path)
+
+    return sorted(modules)
+
+
+def get_stage_state_(hasher: FileHasher, stage: Stage, inputs_hash: str | None = None) -> dict[str, Any]:
+    """Get the state of a stage: hashes of its script and inputs, of its outputs, and of each of their files."""
+    return {
+        "inputs_hash": inputs_hash if inputs_hash is not None else hasher.hash_paths([stage.script, *stage.inputs]),
+        "outputs_hash": hasher.hash_paths(stage.outputs),
+        "files": hasher.hash_files([stage.script, *stage.inputs, *stage.outputs]),
+    }
+
+
+def get_stage_graph(stages: list[Stage]) -> dict[str, set[str]]:
+    """Get the upstream stages of each stage, from the files they read and write.
+
+    Args:
+        stages (list[Stage]): Stages of the pipeline.
+
+    Returns:
+        dict[str, set[str]]: Names of the upstream stages, by stage name.
+
+    """
+    return {
+        stage.name: {
+            other.name for other in stages if other is not stage
+            and any(is_within_(input_path, output_path) for input_path in stage.inputs for output_path in other.outputs)
+        }
+        for stage in stages
+    }
+
+
+def run_pipeline(
+    stages: list[Stage],
+    state_filepath: Path | str,
+    only: list[str] | None = None,
+    force: list[str] | None = None,
+    dry_run: bool = False,
+) -> list[StageRun]:
+    """Run the stages of a pipeline in dependency order, skipping the ones up to date.
+
+    A stage is up to date when the hash of its script and inputs matches the
+    one of its last successful run and its outputs still hash as they did
+    then. Since a stage's inputs include its upstream outputs, a change
+    anywhere reruns exactly the downstream stages it reaches (a rerun stage
+    writing identical outputs stops the propagation).
+
+    Args:
+        stages (list[Stage]): Stages of the pipeline.
+        state_filepath (Path | str): JSON file holding the hashes of the last successful runs.
+        only (list[str] | None, optional): Names of the stages to consider. Defaults to None (all stages).
+        force (list[str] | None, optional): Names of the stages to rerun even if up to date
+            (an empty list forces all considered stages). Defaults to None.
+        dry_run (bool, optional): Report what would run without running it. Defaults to False.
+
+    Returns:
+        list[StageRun]: Outcome of each considered stage, in run order.
+
+    Raises:
+        ValueError: If a stage name is unknown, or the stages form a cycle.
+
+    """
+    stages_by_name: dict[str, Stage] = {stage.name: stage for stage in stages}
+
+    # Raise error if stage names are unknown
+    unknown: set[str] = set(only or []).union(force or []) - set(stages_by_name)
+    if unknown:
+        error_msg: str = f"Unknown stages: {', '.join(sorted(unknown))}. Available stages: {', '.join(stages_by_name)}."
+        raise ValueError(error_msg)
+
+    # Load state of last runs
+    state_filepath = Path(state_filepath)
+    state: dict[str, Any] = orjson.loads(state_filepath.read_bytes()) if state_filepath.exists() else {}
+    stage_states: dict[str, dict[str, Any]] = state.setdefault("stages", {})
+    hasher: FileHasher = FileHasher(state.setdefault("files", {}))
+
+    # Force all stages if force is an empty list
+    forced: set[str] = set(stages_by_name) if force == [] else set(force or [])
+
+    graph: dict[str, set[str]] = get_stage_graph(stages)
+    runs: list[StageRun] = []
+    for name in TopologicalSorter(graph).static_order():
+        if only and name not in only:
+            continue
+        stage: Stage = stages_by_name[name]
+
+        # In a dry run, upstream stages that would run may change the inputs
+        if dry_run and graph[name] & {run.name for run in runs if run.status != "up to date"}:
+            runs.append(StageRun(name, "may run", 0.0))
+            continue
+
+        # Skip stage if up to date
+        inputs_hash: str = hasher.hash_paths([stage.script, *stage.inputs])
+        last: dict[str, Any] | None = stage_states.get(name)
+        if (
+            name not in forced and last is not None and last["inputs_hash"] == inputs_hash
+            and hasher.hash_paths(stage.outputs) == last["outputs_hash"]
+        ):
+            runs.append(StageRun(name, "up to date", 0.0))
+            continue
+
+        if dry_run:
+            runs.append(StageRun(name, "would run", 0.0))
+            continue
+
+        # Run stage headless
+        print(f"Running {name} ({stage.script})")
+        start: float = time.perf_counter()
+        result = subprocess.run([sys.executable, str(stage.script)], check=False)  # noqa: S603
+        seconds: float = time.perf_counter() - start
+
+        # Stop at the first failure (its state is not recorded, so it reruns next time)
+        if result.returncode != 0:
+            runs.append(StageRun(name, f"failed ({result.returncode})", seconds))
+            break
+
+        # Record state
+        stage_states[name] = get_stage_state_(hasher, stage, inputs_hash)
+        state_filepath.parent.mkdir(parents=True, exist_ok=True)
+        state_filepath.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+        runs.append(StageRun(name, "ran", seconds))
+
+    return runs
+
+
+def record_stages(
+    stages: list[Stage],
+    state_filepath: Path | str,
+    names: list[str],
+    changed: list[Path],
+) -> list[str]:
+    """Record stages as up to date with their current script, inputs and outputs, without running them.
+
+    For outputs updated outside the pipeline (e.g., topics assigned to new
+    documents), so the next run does not rerun the stages and overwrite
+    them; downstream stages still see the changed outputs and rerun. A stage
+    is only recorded if, since its last run, nothing but the `changed` files
+    and folders changed among its script, inputs and outputs; otherwise it is
+    left stale (e.g., its code changed too), with a warning.
+
+    Args:
+        stages (list[Stage]): Stages of the pipeline.
+        state_filepath (Path | str): JSON file holding the hashes of the last successful runs.
+        names (list[str]): Names of the stages to record.
+        changed (list[Path]): Files and folders updated outside the pipeline.
+
+    Returns:
+        list[str]: Names of the recorded stages.
+
+    Raises:
+        ValueError: If a stage name is unknown.
+
+    """
+    stages_by_name: dict[str, Stage] = {stage.name: stage for stage in stages}
+
+    # Raise error if stage names are unknown
+    unknown: set[str] = set(names) - set(stages_by_name)
+    if unknown:
+        error_msg: str = f"Unknown stages: {', '.join(sorted(unknown))}. Available stages: {', '.join(stages_by_name)}."
+        raise ValueError(error_msg)
+
+    # Load state of last runs
+    state_filepath = Path(state_filepath)
+    state: dict[str, Any] = orjson.loads(state_filepath.read_bytes()) if state_filepath.exists() else {}
+    stage_states: dict[str, dict[str, Any]] = state.setdefault("stages", {})
+    hasher: FileHasher = FileHasher(state.setdefault("files", {}))
+
+    recorded: list[str] = []
+    for name in names:
+        stage: Stage = stages_by_name[name]
+
+        # Skip stage if its last run is unknown (or recorded without file hashes)
+        last: dict[str, Any] | None = stage_states.get(name)
+        if last is None or "files" not in last:
+            print(f"Warning: {name} not recorded, its last run has no file hashes (run the pipeline first).")
+            continue
+
+        # Skip stage if files other than the changed ones differ from its last run
+        stage_state: dict[str, Any] = get_stage_state_(hasher, stage)
+        last_files: dict[str, str] = last["files"]
+        files: dict[str, str] = stage_state["files"]
+        unexpected: list[str] = sorted(
+            file for file in last_files.keys() | files.keys()
+            if last_files.get(file) != files.get(file)
+            and not any(is_within_(Path(file), changed_path) for changed_path in changed)
+        )
+        if unexpected:
+            print(f"Warning: {name} not recorded, left stale ({', '.join(unexpected)} changed since its last run).")
+            continue
+
+        # Record state
+        stage_states[name] = stage_state
+        recorded.append(name)
+
+    state_filepath.parent.mkdir(parents=True, exist_ok=True)
+    state_filepath.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+    return recorded
+
+
+def print_stage_runs(runs: list[StageRun]) -> None:
+    """Print the outcome and timing of each stage of a pipeline run."""
+    width: int = max([len("total"), *(len(run.name) for run in runs)])
+    print(f"\n{'stage':<{width}}  {'status':<12}  {'seconds':>8}")
+    for run in runs:
+        print(f"{run.name:<{width}}  {run.status:<12}  {run.seconds:8.1f}")
+    print(f"{'total':<{width}}  {'':<12}  {sum(run.seconds for run in runs):8.1f}")
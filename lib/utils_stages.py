@@ -0,0 +1,290 @@
+import hashlib
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import orjson
+import scipy.sparse as sp
+from numpy.typing import ArrayLike, NDArray
+from pynndescent import NNDescent
+from umap import UMAP
+
+from lib.utils_cache import hash_array
+
+# UMAP params not affecting the reduction (left out of cache keys)
+umap_ignored_params: tuple[str, ...] = ("verbose", "tqdm_kwds", "n_jobs", "low_memory")
+
+# Approximate kNN graph: neighbor indices, neighbor distances and the search index
+KNNGraph = tuple[NDArray[np.int32], NDArray[np.float32], NNDescent]
+
+
+def find_knn_folder_(cache_folder: Path, prefix: str, n_neighbors: int) -> Path | None:
+    """Find the cached kNN graph with the fewest neighbors, but at least `n_neighbors`."""
+    candidates: list[tuple[int, Path]] = [
+        (int(folder.name.rsplit("_k", 1)[1]), folder)
+        for folder in cache_folder.glob(f"{prefix}_k*") if (folder / "knn.joblib").exists()
+    ]
+    candidates = [(k, folder) for k, folder in candidates if k >= n_neighbors]
+    return min(candidates)[1] if candidates else None
+
+
+def get_knn_graph(  # noqa: PLR0913
+    embeddings: NDArray,
+    n_neighbors: int,
+    metric: str = "cosine",
+    cache_folder: Path | str | None = None,
+    random_state: int | None = 42,
+    embeddings_hash: str | None = None,
+) -> KNNGraph:
+    """Build (or load) an approximate kNN graph of the embeddings with pynndescent.
+
+    Cached graphs are keyed by (embeddings hash, metric, number of neighbors).
+    A cached graph with more neighbors than requested is reused and truncated,
+    so one graph built for the largest `n_neighbors` serves every smaller one.
+
+    Args:
+        embeddings (NDArray): Embeddings.
+        n_neighbors (int): Number of neighbors of each point (the point itself included, as in UMAP).
+        metric (str, optional): Distance metric. Defaults to "cosine".
+        cache_folder (Path | str | None, optional): Folder of the kNN cache. Defaults to None (no cache).
+        random_state (int | None, optional): Seed of the index construction. Defaults to 42.
+        embeddings_hash (str | None, optional): Hash of the embeddings, if already known. Defaults to None.
+
+    Returns:
+        KNNGraph: Neighbor indices and distances (n_neighbors columns) and the search index.
+
+    """
+    prefix: str = f"{(embeddings_hash or hash_array(embeddings))[:16]}_{metric}"
+
+    # Load cached graph
+    folder: Path | None = find_knn_folder_(Path(cache_folder), prefix, n_neighbors) if cache_folder else None
+    if folder is not None:
+        indices, dists, index = joblib.load(folder / "knn.joblib")
+
+    # Build graph (same construction settings as UMAP)
+    else:
+        n_docs: int = embeddings.shape[0]
+        index = NNDescent(
+            embeddings,
+            n_neighbors=n_neighbors,
+            metric=metric,
+            random_state=random_state,
+            n_trees=min(64, 5 + round(n_docs ** 0.5 / 20.0)),
+            n_iters=max(5, round(np.log2(n_docs))),
+            max_candidates=60,
+            compressed=False,
+        )
+        indices, dists = index.neighbor_graph
+        if cache_folder:
+            folder = Path(cache_folder) / f"{prefix}_k{n_neighbors}"
+            folder.mkdir(parents=True, exist_ok=True)
+            joblib.dump((indices, dists, index), folder / "knn.joblib")
+
+    return indices[:, :n_neighbors], dists[:, :n_neighbors], index
+
+
+class CachedUMAP:
+    """UMAP reduction stage persisted on disk, keyed by (embeddings hash, UMAP params).
+
+    Drop-in replacement for the `umap_model` of BERTopic. On the first fit the
+    wrapped UMAP is fitted and the fitted model, the reduced embeddings and the
+    nearest-neighbor graph are saved to `cache_folder/<key>/`. Later fits on
+    the same embeddings with the same params load them instead, so iterating on
+    clustering or representation settings skips UMAP entirely. The cached UMAP
+    model itself is only loaded when needed (e.g. to transform new embeddings),
+    since unpickling it recompiles its numba search functions (seconds).
+
+    With `share_knn`, the kNN search is taken out of UMAP: one approximate kNN
+    graph is built with pynndescent, cached in `cache_folder/knn/` and passed
+    to UMAP as `precomputed_knn`, so UMAP settings differing only in
+    `n_neighbors` (up to `knn_n_neighbors`), `n_components` or `min_dist`
+    share a single neighbor search. Below 4096 points UMAP would otherwise use
+    an exact kNN search, so sharing changes the result slightly there.
+    """
+
+    def __init__(
+        self,
+        cache_folder: Path | str,
+        share_knn: bool = False,
+        knn_n_neighbors: int | None = None,
+        **umap_params: Any,
+    ) -> None:
+        """Create the stage.
+
+        Args:
+            cache_folder (Path | str): Root folder of the UMAP cache.
+            share_knn (bool, optional): Use a shared, cached kNN graph. Defaults to False.
+            knn_n_neighbors (int | None, optional): Number of neighbors of the shared kNN graph,
+                at least the UMAP `n_neighbors`. Defaults to the UMAP `n_neighbors`.
+            **umap_params (Any): Params of the wrapped UMAP.
+
+        """
+        self.cache_folder: Path = Path(cache_folder)
+        self.share_knn: bool = share_knn
+        self.knn_n_neighbors: int | None = knn_n_neighbors
+        self.umap_params: dict[str, Any] = umap_params
+        self.umap_model_: UMAP | None = None
+        self.umap_path_: Path | None = None
+        self.fit_hash_: str | None = None
+        self.reduced_: NDArray[np.float32] | None = None
+
+    def cache_key(self, embeddings_hash: str, y: ArrayLike | None = None) -> str:
+        """Get the cache key of a reduction.
+
+        Args:
+            embeddings_hash (str): Hash of the embeddings to reduce (see `hash_array`).
+            y (ArrayLike | None, optional): Targets of a supervised reduction. Defaults to None.
+
+        Returns:
+            str: Key made of the embeddings hash and the hash of the UMAP params.
+
+        """
+        # Hash effective params (defaults included, so changing a default changes the key)
+        params: dict[str, Any] = {
+            name: value for name, value in UMAP(**self.umap_params).get_params().items()
+            if name not in umap_ignored_params
+        }
+        params_hash: str = hashlib.sha256(orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        key: str = f"{embeddings_hash[:16]}_{params_hash[:16]}"
+
+        # Supervised reductions depend on targets too
+        if y is not None:
+            key += f"_{hash_array(np.asarray(y))[:16]}"
+
+        # Reductions on a shared kNN graph depend on its size
+        if self.share_knn:
+            key += f"_knn{self.knn_n_neighbors_()}"
+
+        return key
+
+    def knn_n_neighbors_(self) -> int:
+        """Get the number of neighbors of the shared kNN graph."""
+        return max(self.knn_n_neighbors or 0, int(UMAP(**self.umap_params).n_neighbors))
+
+    def get_knn_graph(self, X: ArrayLike, embeddings_hash: str | None = None) -> KNNGraph:
+        """Build (or load) the shared kNN graph of the embeddings.
+
+        Args:
+            X (ArrayLike): Embeddings.
+            embeddings_hash (str | None, optional): Hash of the embeddings, if already known. Defaults to None.
+
+        Returns:
+            KNNGraph: Neighbor indices, distances and search index, with `knn_n_neighbors` columns.
+
+        """
+        umap: UMAP = UMAP(**self.umap_params)
+        return get_knn_graph(
+            np.asarray(X),
+            n_neighbors=self.knn_n_neighbors_(),
+            metric=umap.metric,
+            cache_folder=self.cache_folder / "knn",
+            random_state=umap.random_state,
+            embeddings_hash=embeddings_hash,
+        )
+
+    def fit(self, X: ArrayLike, y: ArrayLike | None = None) -> "CachedUMAP":
+        """Fit the reduction, or load it from the cache.
+
+        Args:
+            X (ArrayLike): Embeddings to reduce.
+            y (ArrayLike | None, optional): Targets of a supervised reduction. Defaults to None.
+
+        Returns:
+            CachedUMAP: Fitted stage.
+
+        """
+        embeddings: NDArray = np.asarray(X)
+        self.fit_hash_ = hash_array(embeddings)
+        key: str = self.cache_key(self.fit_hash_, y)
+        folder: Path = self.cache_folder / key
+
+        # Load cached reduction
+        if (folder / "umap.joblib").exists():
+            print(f"Loading cached UMAP reduction '{key}'.")
+            self.umap_model_ = None
+            self.umap_path_ = folder / "umap.joblib"
+            self.reduced_ = np.load(folder / "reduced.npy")
+
+        # Fit and persist reduction
+        else:
+            umap_params: dict[str, Any] = dict(self.umap_params)
+            if self.share_knn:
+                n_neighbors: int = UMAP(**self.umap_params).n_neighbors
+                indices, dists, index = self.get_knn_graph(embeddings, embeddings_hash=self.fit_hash_)
+                umap_params["precomputed_knn"] = (indices[:, :n_neighbors], dists[:, :n_neighbors], index)
+
+            umap: UMAP = UMAP(**umap_params).fit(embeddings, y=y)
+            self.umap_model_ = umap
+            self.umap_path_ = folder / "umap.joblib"
+            self.reduced_ = np.asarray(umap.transform(embeddings), dtype=np.float32)
+
+            folder.mkdir(parents=True, exist_ok=True)
+            np.save(folder / "reduced.npy", self.reduced_)
+            # UMAP keeps the kNN graph only on its approximate path (large data or precomputed kNN)
+            knn_indices: NDArray | None = getattr(umap, "_knn_indices", None)
+            knn_dists: NDArray | None = getattr(umap, "_knn_dists", None)
+            if knn_indices is not None and knn_dists is not None:
+                np.save(folder / "knn_indices.npy", knn_indices)
+                np.save(folder / "knn_dists.npy", knn_dists)
+            sp.save_npz(folder / "graph.npz", umap.graph_.tocsr())
+            # Written last, marks the entry as complete
+            joblib.dump(umap, self.umap_path_)
+
+        return self
+
+    def transform(self, X: ArrayLike) -> NDArray[np.float32]:
+        """Reduce embeddings, reusing the cached reduction for the fitted embeddings.
+
+        Args:
+            X (ArrayLike): Embeddings to reduce.
+
+        Returns:
+            NDArray[np.float32]: Reduced embeddings.
+
+        Raises:
+            RuntimeError: If the stage is not fitted.
+
+        """
+        # Raise error if not fitted
+        if self.umap_path_ is None:
+            error_msg: str = "The UMAP stage must be fitted before transforming."
+            raise RuntimeError(error_msg)
+
+        embeddings: NDArray = np.asarray(X)
+        if (
+            self.reduced_ is not None
+            and embeddings.shape[0] == self.reduced_.shape[0]
+            and hash_array(embeddings) == self.fit_hash_
+        ):
+            return self.reduced_
+
+        return np.asarray(self.load_umap_(self.umap_path_).transform(embeddings), dtype=np.float32)
+
+    def fit_transform(self, X: ArrayLike, y: ArrayLike | None = None) -> NDArray[np.float32]:
+        """Fit the reduction (or load it from the cache) and get the reduced embeddings."""
+        return self.fit(X, y=y).transform(X)
+
+    def load_umap_(self, umap_path: Path) -> UMAP:
+        """Get the fitted UMAP, loading the cached one on first use."""
+        if self.umap_model_ is None:
+            self.umap_model_ = joblib.load(umap_path)
+        return self.umap_model_
+
+    @property
+    def umap_(self) -> UMAP | None:
+        """Get the fitted UMAP (None if not fitted)."""
+        return self.load_umap_(self.umap_path_) if self.umap_path_ is not None else None
+
+    @property
+    def embedding_(self) -> NDArray[np.float32] | None:
+        """Get the reduced embeddings of the fitted data (as `UMAP.embedding_`)."""
+        return self.umap_.embedding_ if self.umap_ is not None else None
+
+    @property
+    def graph_(self) -> sp.csr_matrix | None:
+        """Get the fuzzy nearest-neighbor graph of the fitted data (as `UMAP.graph_`)."""
+        # Read the cached graph rather than loading the whole UMAP
+        if self.umap_model_ is None and self.umap_path_ is not None:
+            return sp.load_npz(self.umap_path_.parent / "graph.npz")
+        return self.umap_model_.graph_ if self.umap_model_ is not None else None
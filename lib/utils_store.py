@@ -0,0 +1,303 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+import orjson
+import pandas as pd
+from numpy.typing import ArrayLike, DTypeLike, NDArray
+
+from lib.utils_cache import hash_text, hash_texts
+
+# Version of the embedding store format
+store_format_version: int = 1
+
+# Number of rows copied (or checked) at a time
+store_chunk_size: int = 65_536
+
+
+def is_normalized_(embeddings: NDArray, atol: float = 1e-3) -> bool:
+    """Check whether all rows have unit L2 norm, chunk by chunk."""
+    for i in range(0, embeddings.shape[0], store_chunk_size):
+        norms: NDArray = np.linalg.norm(np.asarray(embeddings[i:i + store_chunk_size], dtype=np.float32), axis=1)
+        if not np.allclose(norms, 1.0, atol=atol):
+            return False
+    return True
+
+
+def save_embeddings(  # noqa: PLR0913
+    folder: Path | str,
+    embeddings: NDArray,
+    embedding_model_name: str,
+    doc_ids: list[str] | None = None,
+    dtype: Literal["float32", "float16"] = "float32",
+    doc_hashes: list[str] | None = None,
+) -> dict[str, Any]:
+    """Save embeddings as an embedding store: a `.npy` matrix plus a JSON metadata header.
+
+    The header (embeddings.json) records model, number of rows, dimension,
+    storage dtype, a hash of the document ids the rows are aligned with and
+    whether rows are L2 normalized. Document ids, if any, are written one per
+    line to doc_ids.txt, and the content hashes of their texts (see
+    `hash_text`) to doc_hashes.txt. Rows are written chunk by chunk into a temporary file
+    that then replaces the matrix, so memory-mapped inputs (even the matrix
+    being replaced) are never fully loaded.
+
+    Args:
+        folder (Path | str): Folder of the store.
+        embeddings (NDArray): Embedding matrix, one row per document.
+        embedding_model_name (str): Name of the embedding model.
+        doc_ids (list[str] | None, optional): Ids of the documents, in row order. Defaults to None.
+        dtype (Literal["float32", "float16"], optional): Storage dtype. Defaults to "float32".
+        doc_hashes (list[str] | None, optional): Content hashes of the texts of the documents,
+            aligned with `doc_ids`. Defaults to None.
+
+    Returns:
+        dict[str, Any]: Metadata header.
+
+    Raises:
+        ValueError: If embeddings are not a matrix, or doc ids (or hashes) do not match its rows.
+
+    """
+    # Raise error if shapes are not consistent
+    if embeddings.ndim != 2 or (doc_ids is not None and len(doc_ids) != embeddings.shape[0]):  # noqa: PLR2004
+        error_msg: str = f"Cannot store embeddings of shape {embeddings.shape} for {len(doc_ids or [])} doc ids."
+        raise ValueError(error_msg)
+    if doc_hashes is not None and (doc_ids is None or len(doc_hashes) != len(doc_ids)):
+        error_msg = f"Expected {len(doc_ids or [])} doc hashes, got {len(doc_hashes)}."
+        raise ValueError(error_msg)
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    # Write matrix chunk by chunk, then replace the existing one
+    tmp_path: Path = folder / "embeddings.npy.tmp"
+    matrix: np.memmap = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=embeddings.shape)
+    for i in range(0, embeddings.shape[0], store_chunk_size):
+        matrix[i:i + store_chunk_size] = embeddings[i:i + store_chunk_size]
+    matrix.flush()
+    del matrix
+    tmp_path.replace(folder / "embeddings.npy")
+
+    # Write doc ids
+    doc_ids_path: Path = folder / "doc_ids.txt"
+    if doc_ids is not None:
+        doc_ids_path.write_text("\n".join(doc_ids), encoding="utf-8")
+    else:
+        doc_ids_path.unlink(missing_ok=True)
+
+    # Write doc hashes
+    doc_hashes_path: Path = folder / "doc_hashes.txt"
+    if doc_hashes is not None:
+        doc_hashes_path.write_text("\n".join(doc_hashes), encoding="utf-8")
+    else:
+        doc_hashes_path.unlink(missing_ok=True)
+
+    # Write header
+    header: dict[str, Any] = {
+        "format_version": store_format_version,
+        "embedding_model_name": embedding_model_name,
+        "n_docs": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "dtype": dtype,
+        "doc_ids_hash": hash_texts(doc_ids) if doc_ids is not None else None,
+        "normalized": is_normalized_(embeddings),
+    }
+    (folder / "embeddings.json").write_bytes(orjson.dumps(header, option=orjson.OPT_INDENT_2))
+
+    return header
+
+
+def read_embeddings_header(folder: Path | str) -> dict[str, Any]:
+    """Read the metadata header of an embedding store.
+
+    Stores written before the header existed (embeddings.npy plus
+    embedding_model_name.txt) get a header built from those files.
+
+    Args:
+        folder (Path | str): Folder of the store.
+
+    Returns:
+        dict[str, Any]: Metadata header.
+
+    """
+    folder = Path(folder)
+
+    # Current format
+    header_path: Path = folder / "embeddings.json"
+    if header_path.exists():
+        header: dict[str, Any] = orjson.loads(header_path.read_bytes())
+        return header
+
+    # Legacy format
+    matrix: NDArray = np.load(folder / "embeddings.npy", mmap_mode="r")
+    with (folder / "embedding_model_name.txt").open("r") as f:
+        embedding_model_name: str = f.read().strip()
+
+    return {
+        "format_version": 0,
+        "embedding_model_name": embedding_model_name,
+        "n_docs": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "dtype": str(matrix.dtype),
+        "doc_ids_hash": None,
+        "normalized": None,
+    }
+
+
+def load_embeddings(
+    folder: Path | str,
+    mmap: bool = True,
+    dtype: DTypeLike | None = None,
+    doc_ids: list[str] | None = None,
+) -> tuple[NDArray, dict[str, Any]]:
+    """Load embeddings from an embedding store.
+
+    Args:
+        folder (Path | str): Folder of the store.
+        mmap (bool, optional): Memory-map the matrix instead of reading it into RAM. Defaults to True.
+        dtype (DTypeLike | None, optional): Dtype to convert to (e.g., float32 for float16 stores).
+            Converting copies the matrix into RAM. Defaults to the storage dtype.
+        doc_ids (list[str] | None, optional): Expected document ids, checked against the header hash. Defaults to None.
+
+    Returns:
+        tuple[NDArray, dict[str, Any]]: Embedding matrix and metadata header.
+
+    Raises:
+        ValueError: If the matrix does not match its header, or rows are aligned with other doc ids.
+
+    """
+    folder = Path(folder)
+    header: dict[str, Any] = read_embeddings_header(folder)
+    embeddings: NDArray = np.load(folder / "embeddings.npy", mmap_mode="r" if mmap else None)
+
+    # Raise error if matrix does not match header
+    if embeddings.shape != (header["n_docs"], header["dim"]):
+        error_msg: str = f"Embeddings of shape {embeddings.shape} do not match the header of '{folder}'."
+        raise ValueError(error_msg)
+
+    # Raise error if rows are aligned with other documents
+    if doc_ids is not None and header["doc_ids_hash"] not in (None, hash_texts(doc_ids)):
+        error_msg = f"Embeddings in '{folder}' are not aligned with the given doc ids."
+        raise ValueError(error_msg)
+
+    if dtype is not None and embeddings.dtype != np.dtype(dtype):
+        embeddings = embeddings.astype(dtype)
+
+    return embeddings, header
+
+
+def load_doc_ids(folder: Path | str) -> list[str] | None:
+    """Load the document ids the rows of an embedding store are aligned with.
+
+    Args:
+        folder (Path | str): Folder of the store.
+
+    Returns:
+        list[str] | None: Document ids in row order, or None if the store has none.
+
+    """
+    doc_ids_path: Path = Path(folder) / "doc_ids.txt"
+    if not doc_ids_path.exists():
+        return None
+    text: str = doc_ids_path.read_text(encoding="utf-8")
+    return text.split("\n") if text else []
+
+
+def load_doc_hashes(folder: Path | str) -> list[str] | None:
+    """Load the content hashes of the texts the rows of an embedding store were embedded from.
+
+    Args:
+        folder (Path | str): Folder of the store.
+
+    Returns:
+        list[str] | None: Text hashes in row order, or None if the store has none.
+
+    """
+    doc_hashes_path: Path = Path(folder) / "doc_hashes.txt"
+    if not doc_hashes_path.exists():
+        return None
+    text: str = doc_hashes_path.read_text(encoding="utf-8")
+    return text.split("\n") if text else []
+
+
+def update_embeddings(  # noqa: PLR0913
+    folder: Path | str,
+    doc_ids: list[str],
+    texts: list[str],
+    embed_fn: Callable[[list[str]], ArrayLike],
+    embedding_model_name: str,
+    dtype: Literal["float32", "float16"] = "float32",
+) -> NDArray:
+    """Update an embedding store incrementally, embedding only new or changed documents.
+
+    Rows of documents already in the store with the same text (compared by
+    content hash, see `hash_text`) are reused whatever their position, rows
+    of documents no longer listed are dropped, and the matrix is rebuilt in
+    the order of `doc_ids` with a single gather. Documents whose text changed
+    are embedded again. The whole store is embedded from scratch if it is
+    missing, has no doc ids or text hashes, or was built with another model.
+
+    Args:
+        folder (Path | str): Folder of the store.
+        doc_ids (list[str]): Ids of the documents.
+        texts (list[str]): Texts of the documents, aligned with `doc_ids`.
+        embed_fn (Callable[[list[str]], ArrayLike]): Function embedding a list of texts.
+        embedding_model_name (str): Name of the embedding model.
+        dtype (Literal["float32", "float16"], optional): Storage dtype. Defaults to "float32".
+
+    Returns:
+        NDArray: Memory-mapped embedding matrix, one row per document.
+
+    Raises:
+        ValueError: If doc ids and texts are not aligned, or doc ids are not unique.
+
+    """
+    # Raise error if inputs are not consistent
+    if len(doc_ids) != len(texts) or len(set(doc_ids)) != len(doc_ids):
+        error_msg: str = f"Expected {len(texts)} unique doc ids, got {len(set(doc_ids))} out of {len(doc_ids)}."
+        raise ValueError(error_msg)
+
+    folder = Path(folder)
+    doc_hashes: list[str] = [hash_text(text) for text in texts]
+
+    # Get existing rows of each unchanged document (-1 for new or changed documents)
+    existing: NDArray | None = None
+    positions: NDArray[np.intp] = np.full(len(doc_ids), -1, dtype=np.intp)
+    existing_ids: list[str] | None = load_doc_ids(folder) if (folder / "embeddings.npy").exists() else None
+    existing_hashes: list[str] | None = load_doc_hashes(folder)
+    if existing_ids is not None and existing_hashes is not None:
+        existing, header = load_embeddings(folder, mmap=True, doc_ids=existing_ids)
+        if header["embedding_model_name"] == embedding_model_name:
+            positions = pd.Index(existing_ids).get_indexer(doc_ids)
+            found: NDArray[np.intp] = np.flatnonzero(positions != -1)
+            changed: NDArray[np.bool_] = (
+                np.asarray(existing_hashes, dtype=object)[positions[found]] != np.asarray(doc_hashes, dtype=object)[found]
+            )
+            positions[found[changed]] = -1
+
+    # Embed new and changed documents only
+    new_rows: NDArray[np.intp] = np.flatnonzero(positions == -1)
+    print(f"Embedding {new_rows.size} new or changed documents out of {len(doc_ids)}.")
+    new_embeddings: NDArray | None = np.asarray(embed_fn([texts[i] for i in new_rows])) if new_rows.size else None
+
+    # Gather reused rows and scatter new ones into the merged matrix
+    if new_embeddings is not None:
+        dim: int = new_embeddings.shape[1]
+    elif existing is not None:
+        dim = existing.shape[1]
+    else:
+        # Raise error if nothing can be stored
+        error_msg = "Cannot build an embedding store without documents."
+        raise ValueError(error_msg)
+    merged: NDArray = np.empty((len(doc_ids), dim), dtype=dtype)
+    if existing is not None and new_rows.size < len(doc_ids):
+        reused_rows: NDArray[np.intp] = np.flatnonzero(positions != -1)
+        merged[reused_rows] = existing[positions[reused_rows]]
+    if new_embeddings is not None:
+        merged[new_rows] = new_embeddings
+
+    # Save store
+    save_embeddings(folder, merged, embedding_model_name, doc_ids=doc_ids, dtype=dtype, doc_hashes=doc_hashes)
+
+    return load_embeddings(folder, mmap=True)[0]
@@ -0,0 +1,322 @@
+import itertools
+import random
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from numpy.typing import NDArray
+
+# Factory creating a BERTopic model, as `get_bertopic_model(overrides, cache_folder)` in lib.bertopic
+ModelFactory = Callable[[dict[str, Any] | None, Path | str | None], Any]
+
+# State of a sweep worker process, set by `init_worker_`
+worker_state_: dict[str, Any] = {}
+
+
+def make_sweep_grid(space: dict[str, dict[str, list[Any]]]) -> list[dict[str, dict[str, Any]]]:
+    """Make all the configurations of a search space (grid search).
+
+    Args:
+        space (dict[str, dict[str, list[Any]]]): Values to try, by step and param
+            (e.g., {"umap": {"n_neighbors": [5, 10]}, "hdbscan": {"min_cluster_size": [4, 8]}}).
+
+    Returns:
+        list[dict[str, dict[str, Any]]]: Configurations, as overrides of `get_bertopic_model`.
+
+    """
+    # Flatten space to (step, param) -> values
+    keys: list[tuple[str, str]] = [(step, param) for step, params in space.items() for param in params]
+    values: list[list[Any]] = [space[step][param] for step, param in keys]
+
+    # Build one override per combination of values
+    configs: list[dict[str, dict[str, Any]]] = []
+    for combination in itertools.product(*values):
+        config: dict[str, dict[str, Any]] = {}
+        for (step, param), value in zip(keys, combination, strict=True):
+            config.setdefault(step, {})[param] = value
+        configs.append(config)
+
+    return configs
+
+
+def sample_sweep_grid(
+    space: dict[str, dict[str, list[Any]]],
+    n_samples: int,
+    random_state: int = 42,
+) -> list[dict[str, dict[str, Any]]]:
+    """Sample configurations of a search space (random search).
+
+    Args:
+        space (dict[str, dict[str, list[Any]]]): Values to try, by step and param.
+        n_samples (int): Number of configurations to sample (without replacement).
+        random_state (int, optional): Seed of the sampling. Defaults to 42.
+
+    Returns:
+        list[dict[str, dict[str, Any]]]: Configurations, as overrides of `get_bertopic_model`.
+
+    """
+    configs: list[dict[str, dict[str, Any]]] = make_sweep_grid(space)
+    return random.Random(random_state).sample(configs, min(n_samples, len(configs)))  # noqa: S311
+
+
+def npmi_coherence(topic_words: list[list[str]], doc_term: sp.csr_matrix, vocabulary: dict[str, int]) -> float:
+    """Compute the mean NPMI coherence of topics, from document co-occurrences of their words.
+
+    Args:
+        topic_words (list[list[str]]): Top words of each topic.
+        doc_term (sp.csr_matrix): Document-term matrix of the corpus.
+        vocabulary (dict[str, int]): Column of each word in the document-term matrix.
+
+    Returns:
+        float: Mean NPMI over the word pairs of each topic, averaged over topics (NaN if no topics).
+
+    """
+    # Get binary occurrences, by word
+    occurrences: sp.csc_matrix = (doc_term > 0).astype(np.float64).tocsc()
+    n_docs: int = occurrences.shape[0]
+
+    scores: list[float] = []
+    for words in topic_words:
+        columns: list[int] = [vocabulary[word] for word in words if word in vocabulary]
+        # Skip topics without a word pair
+        if len(columns) < 2:  # noqa: PLR2004
+            continue
+
+        # Get document frequencies of words and word pairs
+        topic_occurrences: sp.csc_matrix = occurrences[:, columns]
+        co_counts: NDArray[np.float64] = (topic_occurrences.T @ topic_occurrences).toarray()
+        p_word: NDArray[np.float64] = np.diag(co_counts) / n_docs
+        p_pair: NDArray[np.float64] = co_counts / n_docs
+
+        # NPMI of each pair (-1 for words never co-occurring)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pmi: NDArray[np.float64] = np.log(p_pair / np.outer(p_word, p_word))
+            npmi: NDArray[np.float64] = np.where(p_pair > 0, pmi / -np.log(p_pair), -1.0)
+        npmi = np.where(p_pair == 1, 1.0, npmi)
+
+        pairs: tuple[NDArray[np.intp], NDArray[np.intp]] = np.triu_indices(len(columns), k=1)
+        scores.append(float(npmi[pairs].mean()))
+
+    return float(np.mean(scores)) if scores else float("nan")
+
+
+def topic_diversity(topic_words: list[list[str]]) -> float:
+    """Compute the share of unique words among the top words of all topics.
+
+    Args:
+        topic_words (list[list[str]]): Top words of each topic.
+
+    Returns:
+        float: Topic diversity, from 0 (all topics alike) to 1 (no shared words); NaN if no topics.
+
+    """
+    all_words: list[str] = [word for words in topic_words for word in words]
+    return len(set(all_words)) / len(all_words) if all_words else float("nan")
+
+
+def flatten_config_(config: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Flatten a configuration to "step.param" keys."""
+    return {f"{step}.{param}": value for step, params in config.items() for param, value in params.items()}
+
+
+def init_worker_(shm_name: str, shape: tuple[int, ...], dtype: str, docs: list[str]) -> None:
+    """Attach a worker process to the shared embeddings."""
+    shm: SharedMemory = SharedMemory(name=shm_name)
+    worker_state_["shm"] = shm
+    worker_state_["embeddings"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    worker_state_["docs"] = docs
+
+
+def knn_config_(factory: ModelFactory, config: dict[str, dict[str, Any]], cache_folder: Path) -> float:
+    """Build (and cache) the shared kNN graph of a configuration, if its UMAP stage uses one, in seconds."""
+    start: float = time.perf_counter()
+    umap_model: Any = factory(config, cache_folder).umap_model
+    if getattr(umap_model, "share_knn", False):
+        umap_model.get_knn_graph(worker_state_["embeddings"])
+    return time.perf_counter() - start
+
+
+def reduce_config_(factory: ModelFactory, config: dict[str, dict[str, Any]], cache_folder: Path) -> float:
+    """Fit (and cache) the UMAP stage of a configuration, in seconds."""
+    start: float = time.perf_counter()
+    topic_model: Any = factory(config, cache_folder)
+    topic_model.umap_model.fit(worker_state_["embeddings"])
+    return time.perf_counter() - start
+
+
+def fit_config_(
+    factory: ModelFactory,
+    config: dict[str, dict[str, Any]],
+    cache_folder: Path,
+    top_n_words: int,
+) -> dict[str, Any]:
+    """Fit a configuration on its cached UMAP reduction and compute its metrics."""
+    docs: list[str] = worker_state_["docs"]
+
+    # Fit model (UMAP is loaded from the cache, so the time is the one of the later steps)
+    start: float = time.perf_counter()
+    topic_model: Any = factory(config, cache_folder)
+    topics, _ = topic_model.fit_transform(docs, embeddings=worker_state_["embeddings"])
+    cluster_fit_time: float = time.perf_counter() - start
+
+    # Get top words of each topic (outliers excluded)
+    topic_words: list[list[str]] = [
+        [word for word, _ in words[:top_n_words] if word]
+        for topic, words in topic_model.get_topics().items() if topic != -1
+    ]
+
+    # Score topics against the corpus tokenized as BERTopic does (its preprocessing strips punctuation)
+    vectorizer: Any = topic_model.vectorizer_model
+    doc_term: sp.csr_matrix = vectorizer.transform(topic_model._preprocess_text(docs))  # noqa: SLF001
+    topics_array: NDArray[np.int64] = np.asarray(topics)
+
+    return {
+        "n_topics": len(topic_words),
+        "outlier_ratio": float(np.mean(topics_array == -1)),
+        "coherence_npmi": npmi_coherence(topic_words, doc_term, vectorizer.vocabulary_),
+        "diversity": topic_diversity(topic_words),
+        "cluster_fit_time": cluster_fit_time,
+    }
+
+
+def run_pass_(futures: dict[Future[float], str], name: str) -> tuple[dict[str, float], dict[str, str]]:
+    """Wait for the tasks of a sweep pass, getting the time of each completed one and the error of each failed one by key."""
+    times: dict[str, float] = {}
+    errors: dict[str, str] = {}
+    for future in as_completed(futures):
+        error: BaseException | None = future.exception()
+        if error is not None:
+            print(f"{name} {futures[future]} failed: {error}")
+            errors[futures[future]] = repr(error)
+        else:
+            times[futures[future]] = future.result()
+    return times, errors
+
+
+def run_sweep(  # noqa: PLR0913
+    docs: list[str],
+    embeddings: NDArray,
+    configs: list[dict[str, dict[str, Any]]],
+    factory: ModelFactory,
+    cache_folder: Path | str = Path("out") / "cache" / "umap",
+    max_workers: int | None = None,
+    top_n_words: int = 10,
+    results_filepath: Path | str | None = None,
+) -> pd.DataFrame:
+    """Fit BERTopic configurations in a process pool and compare them.
+
+    Embeddings are copied once into shared memory, which every worker maps
+    without copying. Configurations are fitted in three passes: the shared kNN
+    graph is built once, for the largest `n_neighbors` of the sweep; UMAP is
+    then fitted once per distinct UMAP setting (cached, see `CachedUMAP`);
+    finally every configuration is fitted reusing the cached reduction, so
+    sweeping clustering or vectorizer settings never refits UMAP. A kNN graph
+    or UMAP setting failing only fails the configurations depending on it.
+
+    Args:
+        docs (list[str]): Documents.
+        embeddings (NDArray): Embeddings of the documents.
+        configs (list[dict[str, dict[str, Any]]]): Configurations, as overrides of the factory
+            (see `make_sweep_grid` and `sample_sweep_grid`).
+        factory (ModelFactory): Module-level factory creating the models (e.g., `get_bertopic_model`).
+        cache_folder (Path | str, optional): Folder of the cached UMAP stage. Defaults to out/cache/umap.
+        max_workers (int | None, optional): Number of worker processes. Defaults to the number of CPUs.
+        top_n_words (int, optional): Number of top words per topic used for coherence and diversity. Defaults to 10.
+        results_filepath (Path | str | None, optional): CSV file to write the results to. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Results, one row per configuration (params flattened to "step.param" columns),
+            with topic count, outlier ratio, NPMI coherence, diversity, the time of the configuration's UMAP
+            setting (fitted once for all its configurations, or loaded from the cache) and the time of the
+            later steps (or the error raised).
+
+    """
+    cache_folder = Path(cache_folder)
+    vectors: NDArray[np.float32] = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    # Size the shared kNN graph for the largest n_neighbors of the sweep
+    n_neighbors: list[int] = [config["umap"]["n_neighbors"] for config in configs if "n_neighbors" in config.get("umap", {})]
+    if n_neighbors:
+        configs_to_fit: list[dict[str, dict[str, Any]]] = [
+            {**config, "knn": {**config.get("knn", {}), "n_neighbors": max(n_neighbors)}} for config in configs
+        ]
+    else:
+        configs_to_fit = configs
+
+    # Get one configuration per distinct kNN graph and per distinct UMAP setting
+    knn_keys: list[str] = [repr(config.get("umap", {}).get("metric")) for config in configs_to_fit]
+    umap_keys: list[str] = [repr(sorted(config.get("umap", {}).items())) for config in configs_to_fit]
+    knn_configs: dict[str, dict[str, dict[str, Any]]] = {}
+    umap_configs: dict[str, dict[str, dict[str, Any]]] = {}
+    for knn_key, umap_key, config in zip(knn_keys, umap_keys, configs_to_fit, strict=True):
+        knn_configs.setdefault(knn_key, config)
+        umap_configs.setdefault(umap_key, config)
+
+    # Copy embeddings into shared memory
+    shm: SharedMemory = SharedMemory(create=True, size=vectors.nbytes)
+    try:
+        np.ndarray(vectors.shape, dtype=vectors.dtype, buffer=shm.buf)[:] = vectors
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker_,
+            initargs=(shm.name, vectors.shape, vectors.dtype.str, docs),
+        ) as executor:
+            # Pass 1 - Build shared kNN graphs once
+            _, knn_errors = run_pass_({
+                executor.submit(knn_config_, factory, config, cache_folder): key for key, config in knn_configs.items()
+            }, "kNN graph")
+
+            # Pass 2 - Fit UMAP once per setting (settings on a failed kNN graph are skipped)
+            print(f"Fitting {len(umap_configs)} UMAP settings for {len(configs)} configurations.")
+            umap_times, umap_errors = run_pass_({
+                executor.submit(reduce_config_, factory, config, cache_folder): key
+                for key, config in umap_configs.items()
+                if repr(config.get("umap", {}).get("metric")) not in knn_errors
+            }, "UMAP setting")
+
+            # Mark configurations on a failed kNN graph or UMAP setting as failed
+            results: list[dict[str, Any]] = [{} for _ in configs]
+            for i, (knn_key, umap_key) in enumerate(zip(knn_keys, umap_keys, strict=True)):
+                pass_error: str | None = knn_errors.get(knn_key) or umap_errors.get(umap_key)
+                if pass_error is not None:
+                    print(f"Configuration {i} failed: {pass_error}")
+                    results[i] = {"error": pass_error}
+
+            # Pass 3 - Fit every other configuration on cached reductions
+            futures: dict[Future[dict[str, Any]], int] = {
+                executor.submit(fit_config_, factory, config, cache_folder, top_n_words): i
+                for i, config in enumerate(configs_to_fit) if not results[i]
+            }
+            for fit_future in as_completed(futures):
+                index: int = futures[fit_future]
+                error: BaseException | None = fit_future.exception()
+                if error is not None:
+                    print(f"Configuration {index} failed: {error}")
+                    results[index] = {"error": repr(error)}
+                else:
+                    results[index] = {"umap_fit_time": umap_times[umap_keys[index]], **fit_future.result()}
+                    print(
+                        f"Configuration {index}: {results[index]['n_topics']} topics in "
+                        f"{results[index]['cluster_fit_time']:.1f}s (UMAP {results[index]['umap_fit_time']:.1f}s)."
+                    )
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Build results table
+    results_df: pd.DataFrame = pd.DataFrame([
+        {**flatten_config_(config), **result} for config, result in zip(configs, results, strict=True)
+    ])
+
+    # Persist results
+    if results_filepath:
+        results_df.to_csv(results_filepath, index=False)
+
+    return results_df
@@ -0,0 +1,264 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import NDArray
+
+# Default number of topics kept per document
+topk_default: int = 5
+
+
+def topic_mapping_matrix_(mappings: dict[int, int], n_clusters: int) -> sp.csr_matrix:
+    """Get the matrix summing HDBSCAN cluster memberships into (merged, reordered) topics.
+
+    Replicates `BERTopic._map_probabilities`: column `from` of the HDBSCAN
+    memberships is added to column `to` of the topic probabilities, outliers
+    are dropped.
+    """
+    n_topics: int = len({to_topic for to_topic in mappings.values() if to_topic != -1})
+    pairs: list[tuple[int, int]] = [
+        (from_topic, to_topic) for from_topic, to_topic in mappings.items()
+        if from_topic != -1 and to_topic != -1 and from_topic < n_clusters
+    ]
+    rows, columns = zip(*pairs, strict=True) if pairs else ((), ())
+    return sp.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)), shape=(n_clusters, n_topics)
+    )
+
+
+def topk_rows_(probs: NDArray[np.float32], k: int) -> sp.csr_matrix:
+    """Keep the k largest (non-zero) values of each row, as a CSR matrix."""
+    k = min(k, probs.shape[1])
+    columns: NDArray[np.intp] = np.argpartition(probs, -k, axis=1)[:, -k:]
+    values: NDArray[np.float32] = np.take_along_axis(probs, columns, axis=1)
+    rows: NDArray[np.intp] = np.repeat(np.arange(probs.shape[0]), k)
+    topk: sp.csr_matrix = sp.csr_matrix((values.ravel(), (rows, columns.ravel())), shape=probs.shape)
+    topk.eliminate_zeros()
+    return topk
+
+
+def get_topk_memberships(
+    clusterer: Any,
+    mappings: dict[int, int],
+    points: NDArray,
+    k: int | None = topk_default,
+    chunk_size: int = 10_000,
+) -> sp.csr_matrix:
+    """Get the k most probable topics of reduced embeddings from a fitted HDBSCAN, as a sparse matrix.
+
+    Args:
+        clusterer (Any): Fitted HDBSCAN (with `prediction_data=True`).
+        mappings (dict[int, int]): HDBSCAN cluster -> topic mapping (see `TopicMapper.get_mappings`).
+        points (NDArray): Reduced (UMAP) embeddings.
+        k (int | None, optional): Number of topics kept per point. Defaults to 5 (None: all topics).
+        chunk_size (int, optional): Number of points processed at a time. Defaults to 10_000.
+
+    Returns:
+        sp.csr_matrix: Float32 matrix of shape (n_points, n_topics), with at most k non-zeros per row.
+
+    """
+    from hdbscan.prediction import membership_vector  # noqa: PLC0415
+
+    # Get membership columns (selected HDBSCAN clusters) -> topics
+    n_clusters: int = len(clusterer.prediction_data_.exemplars)
+    mapping: sp.csr_matrix = topic_mapping_matrix_(mappings, n_clusters)
+    k = mapping.shape[1] if k is None else k
+
+    # Compute memberships chunk by chunk, keeping the top k topics
+    chunks: list[sp.csr_matrix] = []
+    for start in range(0, points.shape[0], chunk_size):
+        memberships: NDArray[np.float32] = np.asarray(
+            membership_vector(clusterer, np.asarray(points[start:start + chunk_size])), dtype=np.float32
+        ).reshape(-1, n_clusters)
+        chunks.append(topk_rows_(np.asarray(memberships @ mapping, dtype=np.float32), k))
+
+    return sp.vstack(chunks, format="csr", dtype=np.float32)
+
+
+def get_topk_probabilities(
+    topic_model: Any,
+    k: int = topk_default,
+    points: NDArray | None = None,
+    chunk_size: int = 10_000,
+) -> sp.csr_matrix:
+    """Get the k most probable topics of each document, as a sparse matrix.
+
+    Memberships are computed by HDBSCAN (`membership_vector`) chunk by chunk,
+    mapped to topics as BERTopic does with `calculate_probabilities=True`, and
+    only the top k of each document are kept. Fit the model with
+    `calculate_probabilities=False`: memory then scales with n_docs * k, not
+    n_docs * n_topics.
+
+    Training documents are scored as new points, whereas BERTopic's dense
+    probabilities (`all_points_membership_vectors`) use their place in the
+    condensed tree, so values differ: on a fit of 3,000 documents and 12
+    topics, the most probable topic matched for every document, with a mean
+    absolute difference of 0.012 (max 0.17).
+
+    Args:
+        topic_model (Any): Fitted BERTopic model (HDBSCAN with `prediction_data=True`).
+        k (int, optional): Number of topics kept per document. Defaults to 5.
+        points (NDArray | None, optional): Reduced (UMAP) embeddings of the documents.
+            Defaults to the documents the model was fitted on.
+        chunk_size (int, optional): Number of documents processed at a time. Defaults to 10_000.
+
+    Returns:
+        sp.csr_matrix: Float32 matrix of shape (n_docs, n_topics), with at most k non-zeros per row.
+
+    """
+    clusterer: Any = topic_model.hdbscan_model
+    return get_topk_memberships(
+        clusterer,
+        topic_model.topic_mapper_.get_mappings(original_topics=True),
+        clusterer.prediction_data_.raw_data if points is None else points,
+        k=k,
+        chunk_size=chunk_size,
+    )
+
+
+def save_probabilities(folder: Path | str, probs: NDArray | sp.spmatrix) -> Path:
+    """Save topic probabilities: sparse as `probs_topk.npz`, dense as `probs.npy`.
+
+    The other format is removed, so loaders never pick up stale probabilities.
+
+    Args:
+        folder (Path | str): Folder of the BERTopic model.
+        probs (NDArray | sp.spmatrix): Topic probabilities, one row per document.
+
+    Returns:
+        Path: Path of the saved file.
+
+    """
+    folder = Path(folder)
+    sparse_path: Path = folder / "probs_topk.npz"
+    dense_path: Path = folder / "probs.npy"
+
+    if sp.issparse(probs):
+        sp.save_npz(sparse_path, sp.csr_matrix(probs, dtype=np.float32))
+        dense_path.unlink(missing_ok=True)
+        return sparse_path
+
+    np.save(dense_path, probs)
+    sparse_path.unlink(missing_ok=True)
+    return dense_path
+
+
+def load_probabilities(folder: Path | str, dense: bool = True) -> NDArray[np.float32] | sp.csr_matrix:
+    """Load the topic probabilities saved by `save_probabilities`.
+
+    Args:
+        folder (Path | str): Folder of the BERTopic model.
+        dense (bool, optional): Return a dense (n_docs, n_topics) array, as the former `probs.npy`
+            (topics outside the top k of a document get 0). Defaults to True.
+
+    Returns:
+        NDArray[np.float32] | sp.csr_matrix: Topic probabilities, one row per document.
+
+    Raises:
+        FileNotFoundError: If no probabilities are saved in the folder.
+
+    """
+    folder = Path(folder)
+
+    # Sparse top-k probabilities
+    if (folder / "probs_topk.npz").exists():
+        probs: sp.csr_matrix = sp.load_npz(folder / "probs_topk.npz").tocsr()
+        return probs.toarray() if dense else probs
+
+    # Dense probabilities
+    if (folder / "probs.npy").exists():
+        dense_probs: NDArray[np.float32] = np.load(folder / "probs.npy", mmap_mode="r")
+        return dense_probs if dense else sp.csr_matrix(dense_probs, dtype=np.float32)
+
+    error_msg: str = f"No topic probabilities in '{folder}'."
+    raise FileNotFoundError(error_msg)
+
+
+def append_probabilities(folder: Path | str, probs: sp.spmatrix) -> Path | None:
+    """Append the topic probabilities of new documents to the saved ones, in the saved format.
+
+    Args:
+        folder (Path | str): Folder of the BERTopic model.
+        probs (sp.spmatrix): Topic probabilities of the new documents, one row per document.
+
+    Returns:
+        Path | None: Path of the saved file, None if no probabilities are saved in the folder.
+
+    """
+    folder = Path(folder)
+
+    # Append sparse top-k probabilities
+    if (folder / "probs_topk.npz").exists():
+        saved: sp.csr_matrix = load_probabilities(folder, dense=False)
+        return save_probabilities(folder, sp.vstack([saved, probs], format="csr", dtype=np.float32))
+
+    # Append dense probabilities
+    if (folder / "probs.npy").exists():
+        dense_probs: NDArray[np.float32] = np.load(folder / "probs.npy")
+        return save_probabilities(folder, np.concatenate([dense_probs, probs.toarray().astype(dense_probs.dtype)]))
+
+    return None
+
+
+def save_topic_model(folder: Path | str, topic_model: Any) -> None:
+    """Save a fitted BERTopic model with its c-TF-IDF state.
+
+    Besides BERTopic's safetensors files, the c-TF-IDF matrix, the c-TF-IDF
+    model and the vectorizer vocabulary are saved (`save_ctfidf=True`).
+    Loading the model then needs no re-vectorization of the corpus.
+
+    Args:
+        folder (Path | str): Folder of the BERTopic model.
+        topic_model (Any): Fitted BERTopic model.
+
+    """
+    topic_model.save(path=Path(folder), serialization="safetensors", save_ctfidf=True)
+
+
+def load_topic_model(
+    folder: Path | str,
+    embedding_model: Any = None,
+    cache_folder: Path | str | None = None,
+    embedding_model_name: str | None = None,
+) -> Any:
+    """Load a BERTopic model saved by `save_topic_model`, with its c-TF-IDF state.
+
+    The c-TF-IDF matrix, the c-TF-IDF model and the fitted vectorizer are
+    restored from the saved files, so `update_topics` (a full
+    re-vectorization of the corpus) is not needed after loading. Without an
+    embedding model, the model is loaded offline: an `OfflineEmbedder`
+    serving cached embeddings is attached instead of the saved embedding
+    model, so no model is loaded and no API key or network is needed.
+
+    Args:
+        folder (Path | str): Folder of the BERTopic model.
+        embedding_model (Any, optional): Embedding model to attach. Defaults to None (offline).
+        cache_folder (Path | str | None, optional): Root folder of the embedding cache looked up offline.
+            Defaults to None (embedding raises).
+        embedding_model_name (str | None, optional): Name of the embedding model, to look up the cache.
+            Defaults to None.
+
+    Returns:
+        Any: BERTopic model.
+
+    Raises:
+        FileNotFoundError: If the model was saved without its c-TF-IDF state.
+
+    """
+    from bertopic import BERTopic  # noqa: PLC0415
+
+    from lib.utils_backend import OfflineEmbedder  # noqa: PLC0415
+
+    folder = Path(folder)
+
+    # Raise error if c-TF-IDF state is missing (models saved before `save_topic_model`)
+    if not (folder / "ctfidf.safetensors").exists():
+        error_msg: str = f"No c-TF-IDF state in '{folder}': save the model with `save_topic_model`."
+        raise FileNotFoundError(error_msg)
+
+    # Attach cached embeddings instead of the saved embedding model
+    if embedding_model is None:
+        embedding_model = OfflineEmbedder(cache_folder, embedding_model_name)
+
+    return BERTopic.load(folder, embedding_model=embedding_model)
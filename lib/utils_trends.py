@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike, NDArray
+
+
+class TopicTrends:
+    """Topic-trend engine over a dense (year x topic) count array built once.
+
+    Years and topics are coded as offsets from their minimum and counted with
+    a single `np.bincount`, so every year in the covered range (also years
+    without documents) gets a row and every topic (the outlier topic -1
+    included) gets a column. Cumulative counts along years answer any period
+    query with one subtraction, in O(n_topics), and rolling means, shares and
+    growth rates are computed for all topics at once.
+    """
+
+    def __init__(self, years: ArrayLike, topics: ArrayLike) -> None:
+        """Count documents by year and topic.
+
+        Args:
+            years (ArrayLike): Publication year of each document (documents without a year are left out).
+            topics (ArrayLike): Topic of each document (-1 for outliers).
+
+        Raises:
+            ValueError: If years and topics are not aligned, or no document has a year.
+
+        """
+        years_series: pd.Series = pd.Series(years)
+        topics_array: NDArray[np.int64] = np.asarray(topics, dtype=np.int64)
+
+        # Raise error if inputs are not consistent
+        if len(years_series) != topics_array.size:
+            error_msg: str = f"Expected {topics_array.size} years, got {len(years_series)}."
+            raise ValueError(error_msg)
+
+        # Leave out documents without a year
+        has_year: NDArray[np.bool_] = years_series.notna().to_numpy()
+        if not has_year.any():
+            error_msg = "Cannot count topics by year without documents having a year."
+            raise ValueError(error_msg)
+        year_codes: NDArray[np.int64] = years_series[has_year].to_numpy(dtype=np.int64)
+        topics_array = topics_array[has_year]
+
+        # Code years and topics as offsets from their minimum
+        self.first_year_: int = int(year_codes.min())
+        self.first_topic_: int = min(int(topics_array.min()), -1)
+        n_years: int = int(year_codes.max()) - self.first_year_ + 1
+        n_topics: int = int(topics_array.max()) - self.first_topic_ + 1
+        year_codes = year_codes - self.first_year_
+        topic_codes: NDArray[np.int64] = topics_array - self.first_topic_
+
+        # Count documents by (year, topic) in one pass
+        self.counts_: NDArray[np.int64] = np.bincount(
+            year_codes * n_topics + topic_codes, minlength=n_years * n_topics
+        ).reshape(n_years, n_topics)
+
+        # Cumulative counts along years (a leading row of zeros, so periods are a single subtraction)
+        self.cumulative_: NDArray[np.int64] = np.zeros((n_years + 1, n_topics), dtype=np.int64)
+        np.cumsum(self.counts_, axis=0, out=self.cumulative_[1:])
+
+        self.years_: pd.Index = pd.RangeIndex(self.first_year_, self.first_year_ + n_years, name="year")
+        self.topics_: pd.Index = pd.RangeIndex(self.first_topic_, self.first_topic_ + n_topics, name="topic")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, year_column: str = "year", topic_column: str = "topic") -> "TopicTrends":
+        """Count the documents of a DataFrame by year and topic.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the topic assignments.
+            year_column (str, optional): Name of the year column. Defaults to "year".
+            topic_column (str, optional): Name of the topic column. Defaults to "topic".
+
+        Returns:
+            TopicTrends: Topic-trend engine.
+
+        """
+        return cls(df[year_column], df[topic_column])
+
+    def period_counts(self, period: tuple[int, int]) -> pd.Series:
+        """Get the number of documents of each topic in a period.
+
+        Args:
+            period (tuple[int, int]): Start and end year of the period (both included, as `Series.between`).
+
+        Returns:
+            pd.Series: Number of documents, by topic.
+
+        """
+        # Clip period to the covered years
+        start: int = min(max(period[0] - self.first_year_, 0), len(self.years_))
+        end: int = min(max(period[1] - self.first_year_ + 1, start), len(self.years_))
+
+        return pd.Series(self.cumulative_[end] - self.cumulative_[start], index=self.topics_, name="count")
+
+    def top_topics(self, period: tuple[int, int], n: int) -> list[int]:
+        """Get the n topics with most documents in a period, as `groupby("topic").size().nlargest(n)`.
+
+        Topics without documents in the period are left out and ties go to
+        the lowest topic, so the result matches the groupby on the filtered
+        DataFrame.
+
+        Args:
+            period (tuple[int, int]): Start and end year of the period (both included).
+            n (int): Number of topics.
+
+        Returns:
+            list[int]: Topics, most prevalent first.
+
+        """
+        counts: NDArray[np.int64] = self.period_counts(period).to_numpy()
+        present: NDArray[np.intp] = np.flatnonzero(counts)
+        order: NDArray[np.intp] = np.argsort(-counts[present], kind="stable")[:n]
+        topics: list[int] = (present[order] + self.first_topic_).tolist()
+        return topics
+
+    def counts(self, exclude_outliers: bool = False) -> pd.DataFrame:
+        """Get the number of documents by year (rows) and topic (columns).
+
+        Args:
+            exclude_outliers (bool, optional): Leave out the outlier topic (-1). Defaults to False.
+
+        Returns:
+            pd.DataFrame: Number of documents by year and topic.
+
+        """
+        counts: pd.DataFrame = pd.DataFrame(self.counts_, index=self.years_, columns=self.topics_)
+        return counts.drop(columns=-1, errors="ignore") if exclude_outliers else counts
+
+    def shares(self, exclude_outliers: bool = True) -> pd.DataFrame:
+        """Get the share of each topic among the documents of each year.
+
+        Args:
+            exclude_outliers (bool, optional): Leave out the outlier topic (-1), also from
+                the yearly totals. Defaults to True.
+
+        Returns:
+            pd.DataFrame: Share of documents by year and topic (NaN for years without documents).
+
+        """
+        counts: pd.DataFrame = self.counts(exclude_outliers=exclude_outliers)
+        totals: NDArray[np.int64] = counts.to_numpy().sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares: NDArray[np.float64] = np.where(totals > 0, counts.to_numpy() / totals, np.nan)
+        return pd.DataFrame(shares, index=counts.index, columns=counts.columns)
+
+    def rolling_mean(self, window: int, shares: bool = False, exclude_outliers: bool = True) -> pd.DataFrame:
+        """Get the rolling mean over years of each topic, as `DataFrame.rolling(window).mean()`.
+
+        Means of counts come from the cumulative counts (one subtraction per
+        year); means of shares from cumulative shares.
+
+        Args:
+            window (int): Number of years of the window (the current year included).
+            shares (bool, optional): Average topic shares instead of counts. Defaults to False.
+            exclude_outliers (bool, optional): Leave out the outlier topic (-1). Defaults to True.
+
+        Returns:
+            pd.DataFrame: Rolling mean by year and topic (NaN for the first `window - 1` years).
+
+        Raises:
+            ValueError: If the window is not positive.
+
+        """
+        # Raise error if window is not positive
+        if window < 1:
+            error_msg: str = f"Expected a positive window, got {window}."
+            raise ValueError(error_msg)
+
+        values: pd.DataFrame = self.shares(exclude_outliers) if shares else self.counts(exclude_outliers)
+
+        # Window sums as differences of cumulative sums (windows with a missing share stay NaN)
+        array: NDArray[np.float64] = values.to_numpy(dtype=np.float64)
+        cumulative: NDArray[np.float64] = np.zeros((len(values) + 1, values.shape[1]))
+        missing: NDArray[np.int64] = np.zeros((len(values) + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(np.nan_to_num(array), axis=0, out=cumulative[1:])
+        np.cumsum(np.isnan(array), axis=0, out=missing[1:])
+        means: NDArray[np.float64] = np.full(values.shape, np.nan)
+        means[window - 1:] = np.where(
+            missing[window:] - missing[:-window] > 0, np.nan, (cumulative[window:] - cumulative[:-window]) / window
+        )
+
+        return pd.DataFrame(means, index=values.index, columns=values.columns)
+
+    def growth(self, periods: int = 1, window: int = 1, shares: bool = False) -> pd.DataFrame:
+        """Get the growth rate of each topic over years, as `DataFrame.pct_change(periods)`.
+
+        Args:
+            periods (int, optional): Number of years the growth is computed over. Defaults to 1.
+            window (int, optional): Number of years the values are averaged over first
+                (see `rolling_mean`), to smooth yearly noise. Defaults to 1.
+            shares (bool, optional): Growth of topic shares instead of counts. Defaults to False.
+
+        Returns:
+            pd.DataFrame: Growth rate by year and topic, outlier topic excluded (NaN where the
+                earlier value is missing or zero).
+
+        Raises:
+            ValueError: If the number of years or the window is not positive.
+
+        """
+        # Raise error if periods is not positive
+        if periods < 1:
+            error_msg: str = f"Expected a positive number of years, got {periods}."
+            raise ValueError(error_msg)
+
+        means: pd.DataFrame = self.rolling_mean(window, shares=shares)
+        values: NDArray[np.float64] = means.to_numpy()
+
+        # Relative change from `periods` years before
+        growth: NDArray[np.float64] = np.full(values.shape, np.nan)
+        previous: NDArray[np.float64] = values[:-periods]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth[periods:] = np.where(previous > 0, values[periods:] / previous - 1, np.nan)
+
+        return pd.DataFrame(growth, index=means.index, columns=means.columns)
@@ -8,10 +8,22 @@ app = marimo.App(width="full")
 def _():
     # Imports
     from pathlib import Path
-    import numpy as np
-    import pandas as pd
     from lib.bertopic.sentence_transformers.model_all_mini_lm_l6_v2 import get_bertopic_model
-    return Path, get_bertopic_model, np, pd
+    from lib.utils_assign import save_assignment_models
+    from lib.utils_io import read_dataset, write_dataset
+    from lib.utils_store import load_embeddings
+    from lib.utils_topics import get_topk_probabilities, save_probabilities, save_topic_model
+    return (
+        Path,
+        get_bertopic_model,
+        get_topk_probabilities,
+        load_embeddings,
+        read_dataset,
+        save_assignment_models,
+        save_probabilities,
+        save_topic_model,
+        write_dataset,
+    )
 
 
 @app.cell
@@ -21,32 +33,35 @@ def _(Path):
     OUTPATH = Path("out") / "sentence_transformers" / "all_mini_lm_l6_v2"
     EMBEDDINGS_FOLDER = OUTPATH / "embeddings"
     BERTOPIC_FOLDER = OUTPATH / "bertopic"
+    UMAP_CACHE_FOLDER = Path("out") / "cache" / "umap"
+    # Also export datasets as CSV (stages exchange Parquet)
+    EXPORT_CSV = False
+    # Topic probabilities kept per doc (sparse), unless the model computes dense ones
+    TOP_K_PROBABILITIES = 5
     BERTOPIC_FOLDER.exists()
-    return BERTOPIC_FOLDER, DATASET_FOLDER, EMBEDDINGS_FOLDER
+    return (
+        BERTOPIC_FOLDER,
+        DATASET_FOLDER,
+        EMBEDDINGS_FOLDER,
+        EXPORT_CSV,
+        TOP_K_PROBABILITIES,
+        UMAP_CACHE_FOLDER,
+    )
 
 
 @app.cell
-def _(DATASET_FOLDER, pd):
+def _(DATASET_FOLDER, read_dataset):
     # Load dataset
-    df = pd.read_csv(DATASET_FOLDER / "dataset.csv")
+    df = read_dataset(DATASET_FOLDER / "dataset.parquet")
     df.sample(5)
     return (df,)
 
 
 @app.cell
-def _(EMBEDDINGS_FOLDER):
-    # Get embedding_model_name
-    with (EMBEDDINGS_FOLDER / "embedding_model_name.txt").open("r") as f:
-        embedding_model_name = f.read()
-    embedding_model_name
-    return
-
-
-@app.cell
-def _(EMBEDDINGS_FOLDER, np):
-    # Load embeddings
-    embeddings = np.load(EMBEDDINGS_FOLDER / "embeddings.npy")
-    embeddings.shape
+def _(EMBEDDINGS_FOLDER, df, load_embeddings):
+    # Load embeddings (memory-mapped), checking they are aligned with the dataset doc ids
+    embeddings, embeddings_header = load_embeddings(EMBEDDINGS_FOLDER, mmap=True, doc_ids=df.doc_id.to_list())
+    embeddings_header
     return (embeddings,)
 
 
@@ -58,32 +73,58 @@ def _(df):
 
 
 @app.cell
-def _(df, embeddings, get_bertopic_model):
-    # Get BERTopic model
-    topic_model = get_bertopic_model()
+def _(
+    TOP_K_PROBABILITIES,
+    UMAP_CACHE_FOLDER,
+    df,
+    embeddings,
+    get_bertopic_model,
+    get_topk_probabilities,
+):
+    # Get BERTopic model (UMAP is only fitted for new embeddings or UMAP settings)
+    topic_model = get_bertopic_model(cache_folder=UMAP_CACHE_FOLDER)
 
     # Fit BERTopic model
     topics, probs = topic_model.fit_transform(df.doc.to_list(), embeddings=embeddings)
+
+    # Compute top-k topic probabilities (sparse) if the model skipped the dense ones
+    if not topic_model.calculate_probabilities:
+        probs = get_topk_probabilities(topic_model, k=TOP_K_PROBABILITIES)
     return probs, topic_model, topics
 
 
 @app.cell
-def _(BERTOPIC_FOLDER, DATASET_FOLDER, df, np, probs, topic_model, topics):
-    # Persist BERTopic model
-    topic_model.save(path=BERTOPIC_FOLDER, serialization="safetensors")
-
-    # Persist probabilities
-    np.save(BERTOPIC_FOLDER / "probs.npy", probs)
+def _(
+    BERTOPIC_FOLDER,
+    DATASET_FOLDER,
+    EXPORT_CSV,
+    df,
+    probs,
+    save_assignment_models,
+    save_probabilities,
+    save_topic_model,
+    topic_model,
+    topics,
+    write_dataset,
+):
+    # Persist BERTopic model, with c-TF-IDF state (loading needs no re-vectorization)
+    save_topic_model(BERTOPIC_FOLDER, topic_model)
+
+    # Persist UMAP, HDBSCAN and topic mapping (to assign topics to new docs, see main.py assign)
+    save_assignment_models(BERTOPIC_FOLDER, topic_model)
+
+    # Persist probabilities (top-k as probs_topk.npz, dense as probs.npy)
+    save_probabilities(BERTOPIC_FOLDER, probs)
 
     # Add topics to dataset
     df["topic"] = topics
 
     # Persist dataset with topics
-    df.to_csv(DATASET_FOLDER / "dataset_topic.csv", index=False)
+    write_dataset(df, DATASET_FOLDER / "dataset_topic.parquet", csv=EXPORT_CSV)
 
     # Persist topics info
     topic_info = topic_model.get_topic_info()
-    topic_info.to_csv(BERTOPIC_FOLDER / "topic_info.csv", index=False)
+    write_dataset(topic_info, BERTOPIC_FOLDER / "topic_info.parquet", csv=EXPORT_CSV)
     return (topic_info,)
 
 
@@ -12,19 +12,23 @@ def _():
     import spacy
     import numpy as np
     import pandas as pd
-    from lib.utils_base import extract_countries
-    from lib.utils_pandas import make_excerpt, make_text_to_embed
+    from lib.utils_base import CountryCache, extract_countries_bulk
+    from lib.utils_io import write_dataset
+    from lib.utils_pandas import make_doc_ids, make_excerpt, make_text_to_embed
     from langdetect import detect
 
     nlp = spacy.load("en_core_web_lg")
     return (
+        CountryCache,
         Path,
-        extract_countries,
+        extract_countries_bulk,
+        make_doc_ids,
         make_excerpt,
         make_text_to_embed,
         nlp,
         orjson,
         pd,
+        write_dataset,
     )
 
 
@@ -33,14 +37,18 @@ def _(Path):
     # Define paths
     DATASET_FOLDER = Path("./dataset")
     OUTPUT_FOLDER = DATASET_FOLDER / "titles_with_excerpts_2"
+    # Also export datasets as CSV (stages exchange Parquet)
+    EXPORT_CSV = False
     OUTPUT_FOLDER.exists()
-    return DATASET_FOLDER, OUTPUT_FOLDER
+    return DATASET_FOLDER, EXPORT_CSV, OUTPUT_FOLDER
 
 
 @app.cell
 def _(
+    CountryCache,
     DATASET_FOLDER,
-    extract_countries,
+    extract_countries_bulk,
+    make_doc_ids,
     make_excerpt,
     make_text_to_embed,
     nlp,
@@ -67,8 +75,12 @@ def _(
     df = df.drop_duplicates(subset="title_lowercase")
     metadata["lossy_ops"].append(("Drop duplicate titles", df.shape[0]))
 
+    # Add stable doc ids (embeddings are aligned by id, not by row position)
+    df["doc_id"] = make_doc_ids(df)
+
     # Compute country
-    df["country"] = df.affiliations.apply(extract_countries, nlp_model=nlp)
+    country_cache = CountryCache()
+    df["country"] = extract_countries_bulk(df.affiliations, nlp_model=nlp, n_process=4, cache=country_cache)
 
     # Make excerpt
     df["excerpt"] = make_excerpt(df, column="abstract", num_paragraphs=2)
@@ -78,7 +90,7 @@ def _(
 
     # Filter columns
     metadata["size_after_processing"] = df.shape[0]
-    return df, metadata
+    return country_cache, df, metadata
 
 
 @app.cell
@@ -88,10 +100,29 @@ def _(metadata):
 
 
 @app.cell
-def _(DATASET_FOLDER, OUTPUT_FOLDER, Path, df, metadata, orjson):
+def _(country_cache):
+    # Show NER work saved by the country cache
+    country_cache.info()
+    return
+
+
+@app.cell
+def _(
+    DATASET_FOLDER,
+    EXPORT_CSV,
+    OUTPUT_FOLDER,
+    Path,
+    df,
+    metadata,
+    orjson,
+    write_dataset,
+):
     # Persist
-    df.loc[:, ["year","country","title","doc"]]\
-        .to_csv(OUTPUT_FOLDER / "dataset.csv", index=False)
+    write_dataset(
+        df.loc[:, ["doc_id","year","country","title","doc"]],
+        OUTPUT_FOLDER / "dataset.parquet",
+        csv=EXPORT_CSV,
+    )
     with Path(DATASET_FOLDER / "cleanup_recap.json").open("wb") as f:
         f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
     return
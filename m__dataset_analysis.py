@@ -8,34 +8,30 @@ app = marimo.App(width="full")
 def _():
     # Imports
     import itertools
-    from os import getenv
     from pathlib import Path
-    from bertopic import BERTopic
-    from bertopic.backend import OpenAIBackend
-    from dotenv import load_dotenv
     from kneed import KneeLocator
-    from openai import OpenAI
-    import numpy as np
     import pandas as pd
     from sklearn.feature_extraction.text import CountVectorizer
     from lib.utils_pandas import get_topics_in_period
     from lib.utils_base import configure_matplotlib_environment
-
-    load_dotenv();
+    from lib.utils_io import read_dataset
+    from lib.utils_store import read_embeddings_header
+    from lib.utils_topics import load_probabilities, load_topic_model
+    from lib.utils_trends import TopicTrends
 
     # Get configured plt env
     plt, colors = configure_matplotlib_environment()
     return (
-        BERTopic,
         KneeLocator,
-        OpenAI,
-        OpenAIBackend,
         Path,
+        TopicTrends,
         colors,
-        getenv,
-        np,
-        pd,
+        get_topics_in_period,
+        load_probabilities,
+        load_topic_model,
         plt,
+        read_dataset,
+        read_embeddings_header,
     )
 
 
@@ -45,47 +41,75 @@ def _(Path):
     DATASET_FOLDER = Path("./dataset/titles_with_excerpts_2/")
     OUT_FOLDER = Path("./out") / "sentence_transformers" / "all_mini_lm_l6_v2"
     EMBEDDING_FOLDER =  OUT_FOLDER / "embeddings"
+    EMBEDDINGS_CACHE_FOLDER = Path("./out") / "cache" / "embeddings"
     BERTOPIC_FOLDER = OUT_FOLDER / "bertopic"
     IMGS_FOLDER = OUT_FOLDER / "imgs"
 
     # Define other constants
     IMGS_FOLDER.exists()
-    return BERTOPIC_FOLDER, DATASET_FOLDER, EMBEDDING_FOLDER, IMGS_FOLDER
+    return (
+        BERTOPIC_FOLDER,
+        DATASET_FOLDER,
+        EMBEDDINGS_CACHE_FOLDER,
+        EMBEDDING_FOLDER,
+        IMGS_FOLDER,
+    )
 
 
 @app.cell
-def _(DATASET_FOLDER, pd):
+def _(DATASET_FOLDER, read_dataset):
     # Load dataset
-    df = pd.read_csv(DATASET_FOLDER / "dataset_topic.csv")
-    docs = df.doc.to_list()
+    df = read_dataset(DATASET_FOLDER / "dataset_topic.parquet")
     df.sample(5)
-    return df, docs
+    return (df,)
 
 
 @app.cell
-def _(EMBEDDING_FOLDER, OpenAI, OpenAIBackend, getenv):
-    # Get embedding_model_name
-    with (EMBEDDING_FOLDER / "embedding_model_name.txt").open("r") as f:
-        embedding_model_name = f.read()
-
-    # Init embedding model
-    client = OpenAI(api_key=getenv("OPENAI_APIKEY"))
-    embedding_model = OpenAIBackend(client=client, embedding_model="text-embedding-3-small")
-    return (embedding_model,)
+def _(EMBEDDING_FOLDER, read_embeddings_header):
+    # Get embedding_model_name (the header is read without loading the embeddings)
+    embedding_model_name = read_embeddings_header(EMBEDDING_FOLDER)["embedding_model_name"]
+    return (embedding_model_name,)
 
 
 @app.cell
-def _(BERTOPIC_FOLDER, BERTopic, docs, embedding_model, np, pd):
-    # Load BERTopic related files
-    topic_model = BERTopic.load(BERTOPIC_FOLDER, embedding_model=embedding_model)
-    probs = np.load(file=BERTOPIC_FOLDER / "probs.npy")
-    topic_model.update_topics(docs)
+def _(
+    BERTOPIC_FOLDER,
+    EMBEDDINGS_CACHE_FOLDER,
+    embedding_model_name,
+    load_probabilities,
+    load_topic_model,
+    read_dataset,
+):
+    # Load BERTopic related files offline (cached embeddings, no embedding model or API key)
+    # c-TF-IDF state is restored, no re-vectorization
+    topic_model = load_topic_model(
+        BERTOPIC_FOLDER, cache_folder=EMBEDDINGS_CACHE_FOLDER, embedding_model_name=embedding_model_name
+    )
+    probs = load_probabilities(BERTOPIC_FOLDER, dense=False)
     topics = topic_model.topics_
-    topics_info = pd.read_csv(BERTOPIC_FOLDER / "topic_info.csv")
+    topics_info = read_dataset(BERTOPIC_FOLDER / "topic_info.parquet")
     topics_info.sort_values(by="Topic")
     return (topics_info,)
 
 
+@app.cell
+def _(TopicTrends, df):
+    # Count docs by year and topic once (period queries, rolling means, shares and growth)
+    trends = TopicTrends.from_frame(df)
+    trends.rolling_mean(window=3, shares=True).tail()
+    return (trends,)
+
+
+@app.cell
+def _(df, get_topics_in_period, topics_info, trends):
+    # Get most prevalent topics by decade
+    {
+        decade: get_topics_in_period(df, topics_info, (decade, decade + 9), trends=trends).Topic.to_list()
+        for decade in range(trends.years_[0] // 10 * 10, trends.years_[-1] + 1, 10)
+    }
+    return
+
+
 @app.cell
 def _(df):
     df[df.doc.str.contains("sui")].topic.value_counts()
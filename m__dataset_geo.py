@@ -11,16 +11,17 @@ def _():
     import pandas as pd
     from pathlib import Path
     from lib.utils_base import configure_matplotlib_environment
+    from lib.utils_io import read_dataset
 
     # Get configured plt env
     plt, colors = configure_matplotlib_environment()
-    return Path, np, pd, plt, colors
+    return Path, colors, np, pd, plt, read_dataset
 
 
 @app.cell
 def _(Path, colors):
     # Define PATHS
-    DATASET_FOLDER = Path("./datasets/dataset_2/")
+    DATASET_FOLDER = Path("./dataset/titles_with_excerpts_2/")
     IMGS_FOLDER = DATASET_FOLDER / "imgs"
 
     # Define other constants
@@ -31,9 +32,9 @@ def _(Path, colors):
 
 
 @app.cell
-def _(DATASET_FOLDER, pd):
-    # Load dataset
-    df = pd.read_csv(DATASET_FOLDER / "dataset.csv")
+def _(DATASET_FOLDER, read_dataset):
+    # Load dataset (only the columns plotted)
+    df = read_dataset(DATASET_FOLDER / "dataset.parquet", columns=["year", "country"])
 
     # Restrict period to 1900-2025
     df = df[df.year.between(1920, 2025)]
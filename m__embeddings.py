@@ -8,24 +8,43 @@ app = marimo.App(width="full")
 def _():
     from pathlib import Path
 
-    import pandas as pd
     import numpy as np
+    from lib.utils_cache import EmbeddingCache
     from lib.utils_embeddings import get_all_minilm_l6_v2_embeddings
-    return Path, get_all_minilm_l6_v2_embeddings, np, pd
+    from lib.utils_io import read_dataset
+    from lib.utils_store import update_embeddings
+    return (
+        EmbeddingCache,
+        Path,
+        get_all_minilm_l6_v2_embeddings,
+        np,
+        read_dataset,
+        update_embeddings,
+    )
 
 
 @app.cell
 def _(Path):
     DATASET_FOLDER = Path("./dataset/titles_with_excerpts_2/")
     EMBEDDINGS_MODEL_NAME = "all-MiniLM-L6-v2"
-    EMBEDDINGS_FOLDER = Path("out") / "sentence_transformers" / "embeddings"
+    EMBEDDINGS_FOLDER = Path("out") / "sentence_transformers" / "all_mini_lm_l6_v2" / "embeddings"
+    # Use "float16" to halve the size of the embedding store
+    EMBEDDINGS_DTYPE = "float32"
+    CACHE_FOLDER = Path("out") / "cache" / "embeddings"
     EMBEDDINGS_FOLDER.exists()
-    return DATASET_FOLDER, EMBEDDINGS_FOLDER, EMBEDDINGS_MODEL_NAME
+    return (
+        CACHE_FOLDER,
+        DATASET_FOLDER,
+        EMBEDDINGS_DTYPE,
+        EMBEDDINGS_FOLDER,
+        EMBEDDINGS_MODEL_NAME,
+    )
 
 
 @app.cell
-def _(DATASET_FOLDER, pd):
-    df = pd.read_csv(DATASET_FOLDER / "dataset.csv")
+def _(DATASET_FOLDER, read_dataset):
+    # Load only the columns to embed
+    df = read_dataset(DATASET_FOLDER / "dataset.parquet", columns=["doc_id", "doc"])
     df.shape
     return (df,)
 
@@ -37,23 +56,29 @@ def _(df):
 
 
 @app.cell
-def _(df, get_all_minilm_l6_v2_embeddings):
-    texts_to_embed = df.doc.to_list()
-    embeddings = get_all_minilm_l6_v2_embeddings(texts_to_embed)
+def _(
+    CACHE_FOLDER,
+    EMBEDDINGS_DTYPE,
+    EMBEDDINGS_FOLDER,
+    EMBEDDINGS_MODEL_NAME,
+    EmbeddingCache,
+    df,
+    get_all_minilm_l6_v2_embeddings,
+    update_embeddings,
+):
+    # Only docs with new ids or changed texts are embedded (through the cache, texts embedded before are reused)
+    cache = EmbeddingCache(CACHE_FOLDER, EMBEDDINGS_MODEL_NAME)
+    embeddings = update_embeddings(
+        EMBEDDINGS_FOLDER,
+        doc_ids=df.doc_id.to_list(),
+        texts=df.doc.to_list(),
+        embed_fn=lambda texts: get_all_minilm_l6_v2_embeddings(texts, cache=cache),
+        embedding_model_name=EMBEDDINGS_MODEL_NAME,
+        dtype=EMBEDDINGS_DTYPE,
+    )
     return (embeddings,)
 
 
-@app.cell
-def _(EMBEDDINGS_FOLDER, EMBEDDINGS_MODEL_NAME, Path, embeddings, np):
-    embedding_model_name_filepath = Path(EMBEDDINGS_FOLDER / "embedding_model_name.txt")
-    with embedding_model_name_filepath.open("w") as f:
-        f.write(EMBEDDINGS_MODEL_NAME)
-
-    embeddings_filepath = Path(EMBEDDINGS_FOLDER / "embeddings.npy")
-    np.save(embeddings_filepath, np.array(embeddings))
-    return
-
-
 @app.cell
 def _(embeddings, np):
     np.array(embeddings).shape
@@ -1,6 +1,174 @@
-def main():
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Literal
+
+from lib.utils_pipeline import (
+    Stage,
+    get_module_inputs,
+    print_stage_runs,
+    record_stages,
+    run_pipeline,
+)
+
+# Paths of the pipeline (relative to the project root)
+PROJECT_FOLDER = Path(__file__).resolve().parent
+DATASET_FOLDER = Path("dataset")
+OUT_FOLDER = Path("out") / "sentence_transformers" / "all_mini_lm_l6_v2"
+STATE_FILEPATH = Path("out") / "pipeline_state.json"
+EMBEDDINGS_CACHE_FOLDER = Path("out") / "cache" / "embeddings"
+
+# Embedding model (as in m__embeddings)
+EMBEDDINGS_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDINGS_DTYPE: Literal["float32", "float16"] = "float32"
+
+# Stages of the pipeline (dependencies follow from the files they read and write, inputs include every
+# lib module the script imports)
+stages: list[Stage] = [
+    Stage(
+        name="dataset",
+        script=Path("m__dataset.py"),
+        inputs=[DATASET_FOLDER / "scopus.csv", *get_module_inputs(Path("m__dataset.py"), root=PROJECT_FOLDER)],
+        outputs=[DATASET_FOLDER / "titles_with_excerpts_2" / "dataset.parquet", DATASET_FOLDER / "cleanup_recap.json"],
+    ),
+    Stage(
+        name="embeddings",
+        script=Path("m__embeddings.py"),
+        inputs=[
+            DATASET_FOLDER / "titles_with_excerpts_2" / "dataset.parquet",
+            *get_module_inputs(Path("m__embeddings.py"), root=PROJECT_FOLDER),
+        ],
+        outputs=[OUT_FOLDER / "embeddings"],
+    ),
+    Stage(
+        name="bertopic_modeling",
+        script=Path("m__bertopic_modeling.py"),
+        inputs=[
+            DATASET_FOLDER / "titles_with_excerpts_2" / "dataset.parquet",
+            OUT_FOLDER / "embeddings",
+            *get_module_inputs(Path("m__bertopic_modeling.py"), root=PROJECT_FOLDER),
+        ],
+        outputs=[OUT_FOLDER / "bertopic", DATASET_FOLDER / "titles_with_excerpts_2" / "dataset_topic.parquet"],
+    ),
+    Stage(
+        name="dataset_analysis",
+        script=Path("m__dataset_analysis.py"),
+        inputs=[
+            DATASET_FOLDER / "titles_with_excerpts_2" / "dataset_topic.parquet",
+            OUT_FOLDER / "bertopic",
+            # Read by the embedding header and by the offline embedder of the loaded model
+            OUT_FOLDER / "embeddings",
+            EMBEDDINGS_CACHE_FOLDER,
+            *get_module_inputs(Path("m__dataset_analysis.py"), root=PROJECT_FOLDER),
+        ],
+        outputs=[OUT_FOLDER / "imgs"],
+    ),
+]
+
+
+def assign(csv: bool = False) -> bool:
+    """Assign topics to the new documents of the dataset with the saved model, and report drift.
+
+    The embeddings and modeling stages are then recorded as up to date, so
+    the next run keeps the assignments instead of refitting the model
+    (unless something else changed since their last run, e.g. their code).
+
+    Args:
+        csv (bool, optional): Also export the dataset with topics as CSV. Defaults to False.
+
+    Returns:
+        bool: Whether drift is large enough to recommend a full refit.
+
+    """
+    from lib.utils_assign import assign_topics, drift_thresholds  # noqa: PLC0415
+    from lib.utils_cache import EmbeddingCache  # noqa: PLC0415
+    from lib.utils_embeddings import get_all_minilm_l6_v2_embeddings  # noqa: PLC0415
+
+    # Embed only texts not cached
+    cache = EmbeddingCache(EMBEDDINGS_CACHE_FOLDER, EMBEDDINGS_MODEL_NAME)
+    report = assign_topics(
+        dataset_filepath=DATASET_FOLDER / "titles_with_excerpts_2" / "dataset.parquet",
+        dataset_topic_filepath=DATASET_FOLDER / "titles_with_excerpts_2" / "dataset_topic.parquet",
+        bertopic_folder=OUT_FOLDER / "bertopic",
+        embeddings_folder=OUT_FOLDER / "embeddings",
+        embed_fn=lambda texts: get_all_minilm_l6_v2_embeddings(texts, cache=cache),
+        embedding_model_name=EMBEDDINGS_MODEL_NAME,
+        embeddings_dtype=EMBEDDINGS_DTYPE,
+        csv=csv,
+    )
+
+    # Keep the updated embedding store and topics at the next run (stages changed otherwise are left stale)
+    record_stages(
+        stages,
+        STATE_FILEPATH,
+        ["embeddings", "bertopic_modeling"],
+        changed=[
+            DATASET_FOLDER / "titles_with_excerpts_2" / "dataset.parquet",
+            DATASET_FOLDER / "titles_with_excerpts_2" / "dataset_topic.parquet",
+            OUT_FOLDER / "embeddings",
+            OUT_FOLDER / "bertopic" / "probs_topk.npz",
+            OUT_FOLDER / "bertopic" / "probs.npy",
+        ],
+    )
+
+    # Print drift of the documents assigned since the fit
+    print(f"\n{'drift':<24}  {'value':>8}  {'threshold':>9}")
+    for name, value in report["drift"].items():
+        threshold: str = f"{drift_thresholds[name]:9.3f}" if name in drift_thresholds else ""
+        print(f"{name:<24}  {value:8.3f}  {threshold}")
+    if report["refit"]:
+        print(
+            f"\nDrift exceeds {', '.join(report['exceeded'])}: "
+            "refit the model (python main.py run --force bertopic_modeling)."
+        )
+
+    return bool(report["refit"])
+
+
+def main() -> None:
     """Aviation Psychology Topic Trends with LLMs."""
-    print("On we go!")
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Run pipeline
+    run_parser = subparsers.add_parser("run", help="Run the stages whose inputs changed since their last run")
+    run_parser.add_argument("--only", nargs="+", metavar="STAGE", help="Consider only these stages")
+    run_parser.add_argument(
+        "--force", nargs="*", metavar="STAGE", help="Rerun these stages (all stages if none given) even if up to date"
+    )
+    run_parser.add_argument("--dry-run", action="store_true", help="Show what would run without running it")
+
+    # Assign topics
+    assign_parser = subparsers.add_parser(
+        "assign", help="Assign topics to new documents without refitting, and report drift"
+    )
+    assign_parser.add_argument("--csv", action="store_true", help="Also export the dataset with topics as CSV")
+    assign_parser.add_argument(
+        "--fail-on-drift", action="store_true", help="Exit with code 3 if drift recommends a full refit"
+    )
+
+    args = parser.parse_args()
+
+    # Stage paths are relative to the project root
+    os.chdir(PROJECT_FOLDER)
+
+    if args.command == "run":
+        try:
+            runs = run_pipeline(stages, STATE_FILEPATH, only=args.only, force=args.force, dry_run=args.dry_run)
+        except ValueError as e:
+            parser.error(str(e))
+        print_stage_runs(runs)
+        if any(run.status.startswith("failed") for run in runs):
+            sys.exit(1)
+
+    if args.command == "assign":
+        try:
+            refit = assign(csv=args.csv)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        if refit and args.fail_on_drift:
+            sys.exit(3)
 
 
 if __name__ == "__main__":